@@ -0,0 +1,166 @@
+"""
+File: atlasExporter.py
+Description: 批量导出：把大量标题裁掉透明边后装进图集（sprite sheet），写出图集和 JSON 索引，装满一张就写出一张
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import json
+import os
+from concurrent.futures import Future
+from typing import Callable, Iterable
+
+from PIL import Image
+
+from exporter import ExportProfile, ExportResult, encode_image, get_executor
+from titleGenerator import generate_font_image
+
+MAX_PENDING_SHEETS = 2  # 最多同时有几张写满的图集在排队编码，限制内存占用
+
+
+class SkylinePacker:
+    """
+    天际线（skyline）装箱：记录已放置区域的上轮廓，新矩形放在使底边最低的位置（同样低时取最左）
+    只需要按到达顺序依次放入，不需要预先知道全部矩形，适合边渲染边装箱
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width, self.height = width, height
+        self.skyline = [(0, 0, width)]  # 每一段为 (x, y, 宽度)，按 x 排序
+        self.used_width = self.used_height = 0
+
+    def _fit(self, index: int, width: int, height: int) -> int | None:
+        """矩形左端放在第 index 段时的 y 坐标，放不下返回 None"""
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        y, remaining = 0, width
+        while remaining > 0:
+            _, seg_y, seg_w = self.skyline[index]
+            y = max(y, seg_y)
+            if y + height > self.height:
+                return None
+            remaining -= seg_w
+            index += 1
+        return y
+
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        """
+        放入一个矩形
+        :return: 左上角坐标，放不下时返回 None
+        """
+        best = None
+        for i in range(len(self.skyline)):
+            y = self._fit(i, width, height)
+            if y is not None and (best is None or (y + height, self.skyline[i][0]) < best[0]):
+                best = ((y + height, self.skyline[i][0]), i, y)
+        if best is None:
+            return None
+        _, index, y = best
+        x = self.skyline[index][0]
+        self._add_level(index, x, y + height, width)
+        self.used_width = max(self.used_width, x + width)
+        self.used_height = max(self.used_height, y + height)
+        return x, y
+
+    def _add_level(self, index: int, x: int, y: int, width: int):
+        """把 [x, x + width) 这一段的轮廓抬高到 y，并合并高度相同的相邻段"""
+        self.skyline.insert(index, (x, y, width))
+        i = index + 1
+        while i < len(self.skyline):
+            seg_x, seg_y, seg_w = self.skyline[i]
+            overlap = x + width - seg_x
+            if overlap <= 0:
+                break
+            if overlap < seg_w:
+                self.skyline[i] = (seg_x + overlap, seg_y, seg_w - overlap)
+                break
+            del self.skyline[i]
+        merged = [self.skyline[0]]
+        for seg in self.skyline[1:]:
+            if seg[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + seg[2])
+            else:
+                merged.append(seg)
+        self.skyline = merged
+
+
+def export_atlas(output_path: str, jobs: Iterable[tuple[str, dict]], sheet_size: tuple[int, int] = (2048, 2048),
+                 padding: int = 2, profile: ExportProfile = ExportProfile.BALANCED,
+                 report: Callable[[ExportResult], None] | None = print) -> dict:
+    """
+    批量渲染标题并装进图集
+    每个标题裁掉四周的透明区域后放进当前图集，放不下时把当前图集交给后台线程写出，再开一张新的，
+    所以同一时间内存里只有正在装的一张和最多 MAX_PENDING_SHEETS 张正在编码的图集
+    :param output_path: 输出路径模板，例如 "out/titles.png" 会写出 "out/titles_0.png"、"out/titles_1.png"……
+                        和索引 "out/titles.json"
+    :param jobs: (名称, generate_font_image 的参数) 的可迭代对象，可以是生成器
+    :param sheet_size: 每张图集的最大尺寸，最后一张会裁到实际用到的大小
+    :param padding: 标题之间的间隔（像素），防止缩放采样时相邻标题串色
+    :param profile: 导出档位
+    :param report: 每张图集写完后的回调，传 None 不输出
+    :return: 索引，结构与写出的 JSON 相同
+    """
+    stem, ext = os.path.splitext(output_path)
+    index = {"sheets": [], "frames": {}}
+    pending: list[Future] = []
+
+    def wait(limit):
+        while len(pending) > limit:
+            result = pending.pop(0).result()
+            if report is not None:
+                report(result)
+
+    def new_sheet():
+        return Image.new("RGBA", sheet_size, (0, 0, 0, 0)), SkylinePacker(*sheet_size)
+
+    def flush(sheet, packer, last=False):
+        if not packer.used_width:
+            return
+        if last:
+            sheet = sheet.crop((0, 0, packer.used_width, packer.used_height))
+        path = f"{stem}_{len(index['sheets'])}{ext}"
+        index["sheets"].append({"file": os.path.basename(path), "size": list(sheet.size)})
+        wait(MAX_PENDING_SHEETS - 1)
+        pending.append(get_executor().submit(encode_image, sheet, path, profile))
+
+    sheet, packer = new_sheet()
+    for name, kwargs in jobs:
+        if name in index["frames"]:
+            raise ValueError(f"图集里已经有名为 {name} 的标题")
+        img = generate_font_image(**kwargs)
+        # 记录裁掉的偏移和原尺寸，使用方可以还原到原画布上的位置
+        bbox = img.getchannel("A").getbbox() or (0, 0, 1, 1)
+        trimmed = img.crop(bbox)
+        w, h = trimmed.width + padding, trimmed.height + padding
+        if w > sheet_size[0] or h > sheet_size[1]:
+            raise ValueError(f"标题 {name} 裁剪后为 {trimmed.width}x{trimmed.height}，放不进 "
+                             f"{sheet_size[0]}x{sheet_size[1]} 的图集")
+        position = packer.insert(w, h)
+        if position is None:
+            flush(sheet, packer)
+            sheet, packer = new_sheet()
+            position = packer.insert(w, h)
+        sheet.paste(trimmed, position)
+        index["frames"][name] = {
+            "sheet": len(index["sheets"]),
+            "x": position[0], "y": position[1], "w": trimmed.width, "h": trimmed.height,
+            "offset": list(bbox[:2]),
+            "source_size": list(img.size),
+        }
+    flush(sheet, packer, last=True)
+    wait(0)
+
+    with open(f"{stem}.json", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return index
+
+
+if __name__ == "__main__":
+    from resource_path import resource_path
+
+    fonts = {"font_path": resource_path("fonts/index.ttf"), "small_font_path": resource_path("fonts/YuGothB.ttc")}
+    titles = [("科学", "超電磁砲"), ("魔術", "禁書目録"), ("学都", "标题工房"), ("科学", "一方通行")]
+    os.makedirs("atlas", exist_ok=True)
+    export_atlas("atlas/titles.png",
+                 ((f"{t1}_{t2}", {"text1": t1, "text2": t2, "width": 480, "height": 253, **fonts})
+                  for t1, t2 in titles))
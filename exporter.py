@@ -0,0 +1,187 @@
+"""
+File: exporter.py
+Description: 图片导出：按速度/体积档位编码，在后台线程中并行写出多种格式，并统计耗时和文件大小
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Callable, NamedTuple
+
+from PIL import Image
+
+
+class ExportProfile(Enum):
+    """导出档位"""
+    FAST = 1  # 编码最快，文件稍大
+    BALANCED = 2  # 默认
+    SMALLEST = 3  # 文件最小，编码最慢
+
+
+# 各档位下每种格式传给 Image.save 的参数
+PROFILE_OPTIONS = {
+    ExportProfile.FAST: {
+        "PNG": {"compress_level": 1},
+        "WEBP": {"lossless": True, "quality": 0, "method": 0},
+        "JPEG": {"quality": 90},
+    },
+    ExportProfile.BALANCED: {
+        "PNG": {"compress_level": 6},
+        "WEBP": {"lossless": True, "quality": 75, "method": 4},
+        "JPEG": {"quality": 92, "optimize": True},
+    },
+    ExportProfile.SMALLEST: {
+        "PNG": {"compress_level": 9, "optimize": True},
+        "WEBP": {"lossless": True, "quality": 100, "method": 6},
+        "JPEG": {"quality": 92, "optimize": True, "progressive": True},
+    },
+}
+
+_FORMATS = {".png": "PNG", ".webp": "WEBP", ".jpg": "JPEG", ".jpeg": "JPEG"}
+
+
+class ExportResult(NamedTuple):
+    """单个文件的导出结果"""
+    path: str
+    format: str
+    seconds: float  # 编码并写入所用时间
+    bytes: int  # 文件大小
+
+    def __str__(self):
+        return f"{self.path} [{self.format}] {self.bytes / 1024:.1f} KB, {self.seconds * 1000:.1f} ms"
+
+
+def trim_alpha(img: Image.Image) -> Image.Image:
+    """裁掉四周完全透明的部分，没有透明通道或全透明时原样返回"""
+    if img.mode != "RGBA":
+        return img
+    bbox = img.getchannel("A").getbbox()
+    if bbox is None or bbox == (0, 0, img.width, img.height):
+        return img
+    return img.crop(bbox)
+
+
+def encode_image(img: Image.Image, path: str, profile: ExportProfile = ExportProfile.BALANCED,
+                 trim: bool = False) -> ExportResult:
+    """
+    按档位把一张图片编码写入文件
+    :param img: 要保存的图片
+    :param path: 输出路径，格式由后缀决定（png / webp / jpg）
+    :param profile: 导出档位
+    :param trim: 是否裁掉四周的透明区域
+    :return: 导出结果
+    """
+    file_format = _FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"不支持的图片格式：{path}")
+    start = time.perf_counter()
+    if trim:
+        img = trim_alpha(img)
+    if file_format == "JPEG" and img.mode in ("RGBA", "LA", "P"):
+        # JPEG 没有透明通道，铺在白底上
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.convert("RGBA").getchannel("A"))
+        img = background
+    img.save(path, file_format, **PROFILE_OPTIONS[profile][file_format])
+    return ExportResult(path, file_format, time.perf_counter() - start, os.path.getsize(path))
+
+
+# Pillow 编码时会释放 GIL，多种格式可以在线程池里真正并行
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """导出共用的后台线程池，其他批量导出（如图集）也提交到这里，避免各自再开一组线程"""
+    global _executor
+    # GUI 的多个导出任务可能在不同线程里同时第一次调用，加锁保证只创建一个线程池
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="export")
+        return _executor
+
+
+def _submit(img: Image.Image, paths: list[str], profile: ExportProfile, trim: bool) -> list[Future]:
+    return [get_executor().submit(encode_image, img, path, profile, trim) for path in paths]
+
+
+def export_async(img: Image.Image, paths: list[str], profile: ExportProfile = ExportProfile.BALANCED,
+                 trim: bool = False) -> list[Future]:
+    """
+    在后台线程中导出到多个文件，立即返回
+    :return: 每个文件一个 Future，结果为 ExportResult
+    """
+    # 先复制一份，调用方之后修改 img 也不影响正在进行的编码
+    return _submit(img.copy(), paths, profile, trim)
+
+
+def export_image(img: Image.Image, paths: list[str], profile: ExportProfile = ExportProfile.BALANCED,
+                 trim: bool = False, report: Callable[[ExportResult], None] | None = print) -> list[ExportResult]:
+    """
+    把一次渲染的结果并行导出到多个文件，等待全部完成
+    返回前所有编码都已结束，所以不复制 img；调用方在导出期间不能修改它
+    :param report: 每个文件完成后的回调，默认打印耗时和大小；传 None 不输出
+    :return: 与 paths 顺序一致的导出结果
+    """
+    results = [future.result() for future in _submit(img, paths, profile, trim)]
+    if report is not None:
+        for result in results:
+            report(result)
+    return results
+
+
+# 多尺寸导出：每个尺寸是一个外框，图片按比例缩放到刚好放进外框
+EXPORT_SIZES = {
+    "4k": (3840, 2160),
+    "1080p": (1920, 1080),
+    "720p": (1280, 720),
+    "thumbnail": (320, 180),
+    "icon": (64, 64),
+}
+
+
+def fit_size(size: tuple[int, int], box: tuple[int, int]) -> tuple[int, int]:
+    """按比例缩放 size，使其刚好放进 box"""
+    scale = min(box[0] / size[0], box[1] / size[1])
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def export_sizes(output_path: str, sizes: dict[str, tuple[int, int]] | None = None,
+                 formats: tuple[str, ...] = ("png",), profile: ExportProfile = ExportProfile.BALANCED,
+                 trim: bool = False, report: Callable[[ExportResult], None] | None = print,
+                 **kwargs) -> list[ExportResult]:
+    """
+    一次写出同一个标题的多个尺寸
+    每个尺寸直接按自己的分辨率渲染：渲染只计算文字覆盖的像素，和整幅图转预乘 alpha、缩小再转回的开销相当，
+    从最大尺寸缩小出其他尺寸并不更快（非整数倍的 LANCZOS 比直接渲染还慢），所以不做缩放
+    从大到小渲染，每渲染完一个尺寸就交给线程池编码，大图的编码和后面小图的渲染同时进行
+    :param output_path: 输出路径模板，例如 "out/title.png" 会写出 "out/title_1080p.png" 等
+    :param sizes: 名称 -> 外框尺寸，默认 EXPORT_SIZES
+    :param formats: 每个尺寸要写出的格式后缀
+    :param kwargs: 传给 generate_font_image 的参数（width/height 会被忽略）
+    :return: 所有文件的导出结果
+    """
+    from titleGenerator import Direction, generate_font_image, resolve_canvas
+
+    if sizes is None:
+        sizes = EXPORT_SIZES
+    kwargs.pop("width", None)
+    kwargs.pop("height", None)
+    base_w, base_h, _ = resolve_canvas(kwargs.get("direction", Direction.HORIZONTAL),
+                                       template=kwargs.get("template"))
+    targets = {name: fit_size((base_w, base_h), box) for name, box in sizes.items()}
+
+    stem = os.path.splitext(output_path)[0]
+    futures = []
+    for name, (width, height) in sorted(targets.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+        img = generate_font_image(width=width, height=height, **kwargs)
+        # 渲染出的图片之后不会再修改，直接提交，不需要复制
+        futures += _submit(img, [f"{stem}_{name}.{fmt.lstrip('.')}" for fmt in formats], profile, trim)
+    results = [future.result() for future in futures]
+    if report is not None:
+        for result in results:
+            report(result)
+    return results
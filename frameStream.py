@@ -0,0 +1,198 @@
+"""
+File: frameStream.py
+Description: 把动态标题的原始 RGBA 帧直接写到标准输出、命名管道或内存映射环形缓冲区，供 ffmpeg 等视频管线使用
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import mmap
+import queue
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from titleAnimation import iter_animation_batches
+
+RING_MAGIC = b"TMIR"
+# 环形缓冲区文件头：magic, width, height, slots, frame_size, 已写入帧数, 已读取帧数, 是否写完
+# 已写入帧数和是否写完只由写入方修改，已读取帧数只由读取方修改
+RING_HEADER = struct.Struct("<4sIIIQQQI")
+_COUNTER = struct.Struct("<Q")
+_WRITTEN_OFFSET = 24
+_READ_OFFSET = 32
+_DONE = struct.Struct("<I")
+_DONE_OFFSET = 40
+POLL_INTERVAL = 0.001  # 等待对方时的轮询间隔（秒）
+
+
+class RingBufferSink:
+    """
+    内存映射环形缓冲区（写入方）
+    文件开头是 RING_HEADER，后面是 slots 个 width * height * 4 字节的帧槽，第 n 帧（从 0 开始）写在 n % slots 号槽里
+    写完一帧的数据后才把已写入帧数加一，读取方读完一帧后把已读取帧数加一；
+    不会覆盖没读过的帧：已写入 - 已读取 达到 slots 时 write 会等待读取方，和管道写满时一样
+    """
+
+    def __init__(self, path: str, width: int, height: int, slots: int = 4, timeout: float | None = None):
+        """
+        :param timeout: 缓冲区满时最多等待读取方多少秒，超时抛出 TimeoutError；None 表示一直等
+        """
+        self.width, self.height, self.slots = width, height, slots
+        self.frame_size = width * height * 4
+        self.timeout = timeout
+        self.count = 0
+        size = RING_HEADER.size + slots * self.frame_size
+        with open(path, "wb") as f:
+            f.truncate(size)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._map[:RING_HEADER.size] = RING_HEADER.pack(RING_MAGIC, width, height, slots, self.frame_size, 0, 0, 0)
+
+    def _read_count(self) -> int:
+        return _COUNTER.unpack_from(self._map, _READ_OFFSET)[0]
+
+    def write(self, data) -> int:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while self.count - self._read_count() >= self.slots:
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"环形缓冲区已满，读取方 {self.timeout} 秒没有读取")
+            time.sleep(POLL_INTERVAL)
+        start = RING_HEADER.size + (self.count % self.slots) * self.frame_size
+        self._map[start:start + self.frame_size] = data
+        # 数据写完之后才公布，读取方看到的帧一定是完整的
+        self.count += 1
+        _COUNTER.pack_into(self._map, _WRITTEN_OFFSET, self.count)
+        return self.frame_size
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        # 告诉读取方不会再有新的帧
+        _DONE.pack_into(self._map, _DONE_OFFSET, 1)
+        self._map.close()
+        self._file.close()
+
+
+class RingBufferReader:
+    """
+    内存映射环形缓冲区（读取方），按顺序读出 RingBufferSink 写入的每一帧
+    读完一帧后更新文件头里的已读取帧数，写入方据此复用帧槽
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.width, self.height, self.slots, self.frame_size, _, self.count, _ = \
+            RING_HEADER.unpack_from(self._map)
+        if magic != RING_MAGIC:
+            raise ValueError(f"{path} 不是标题帧的环形缓冲区")
+
+    def read(self) -> bytes | None:
+        """读出下一帧，写入方已结束且没有剩余帧时返回 None"""
+        while True:
+            written = _COUNTER.unpack_from(self._map, _WRITTEN_OFFSET)[0]
+            if written > self.count:
+                break
+            if _DONE.unpack_from(self._map, _DONE_OFFSET)[0]:
+                # 结束标记可能在最后一帧公布前后被看到，再确认一次
+                if _COUNTER.unpack_from(self._map, _WRITTEN_OFFSET)[0] == self.count:
+                    return None
+                continue
+            time.sleep(POLL_INTERVAL)
+        start = RING_HEADER.size + (self.count % self.slots) * self.frame_size
+        frame = self._map[start:start + self.frame_size]
+        self.count += 1
+        _COUNTER.pack_into(self._map, _READ_OFFSET, self.count)
+        return frame
+
+    def __iter__(self):
+        while (frame := self.read()) is not None:
+            yield frame
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def open_sink(target: str, width: int, height: int, slots: int = 4):
+    """
+    打开输出目标
+    :param target: "-" 表示标准输出；"ring:路径" 表示内存映射环形缓冲区（用 RingBufferReader 读取）；其他都当作文件或命名管道
+    :param slots: 环形缓冲区的帧槽数
+    """
+    if target == "-":
+        return sys.stdout.buffer
+    if target.startswith("ring:"):
+        return RingBufferSink(target[len("ring:"):], width, height, slots)
+    # 命名管道在 open 时会阻塞，直到另一端开始读取
+    return open(target, "wb")
+
+
+def stream_raw_frames(target: str = "-", slots: int = 4, **kwargs) -> int:
+    """
+    把动态标题逐帧写成原始 RGBA（每帧 width * height * 4 字节，没有任何 PNG 编码）
+    渲染在后台线程进行，和写出上一批帧的过程重叠（双缓冲）
+    :param target: 输出目标，见 open_sink
+    :param slots: 环形缓冲区的帧槽数
+    :param kwargs: 传给 iter_animation_batches 的参数
+    :return: 写出的帧数
+    """
+    # 最多一批已渲染好的帧在排队：一批正在写出，一批正在渲染
+    batches = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for batch in iter_animation_batches(**kwargs):
+                while not stop.is_set():
+                    try:
+                        batches.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            batches.put(None)
+        except BaseException as e:
+            batches.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    sink = None
+    count = 0
+    try:
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if isinstance(batch, BaseException):
+                raise batch
+            if sink is None:
+                _, height, width, _ = batch.shape
+                sink = open_sink(target, width, height, slots)
+            for frame in batch:
+                # 直接写 numpy 的内存，不经过 PIL，也不复制
+                sink.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+                count += 1
+        if sink is not None:
+            sink.flush()
+    finally:
+        stop.set()
+        if sink is not None and sink is not sys.stdout.buffer:
+            sink.close()
+    return count
+
+
+if __name__ == "__main__":
+    # 示例：python frameStream.py | ffmpeg -f rawvideo -pix_fmt rgba -s 1937x1022 -r 30 -i - out.mov
+    from resource_path import resource_path
+    from titleGenerator import science_color
+
+    n = stream_raw_frames("-", text1="学都", text2="标题工房", text3="title",
+                          font_path=resource_path("fonts/index.ttf"),
+                          small_font_path=resource_path("fonts/YuGothB.ttc"),
+                          colors=science_color, frames=90)
+    print(f"Streamed {n} frames", file=sys.stderr)
@@ -0,0 +1,151 @@
+"""
+File: layoutEngine.py
+Description: 任意长度 text1/text2 的自动排版，只读取字体度量（前进宽度），不需要试渲染
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+from functools import lru_cache
+
+from PIL import ImageFont
+
+# 每一行（列）的参数都按样例图（tools/measures.py）的排版估算，坐标是相对画布中心的比例
+# weights：每个字相对画布高度的比例，决定同一行里字与字之间的大小关系
+PREFIX_WEIGHTS = (0.4471, 0.3023, 0.2084)  # とある
+TEXT1_WEIGHT = 0.427
+NO_WEIGHT = 0.3297  # の
+RECT_WEIGHT = 0.5  # 方框里的字
+TEXT2_WEIGHT = 0.45
+
+HORIZONTAL_ROWS = {
+    # 行：(起点, 终点, 底边), 都是画布宽/高的比例
+    1: (-0.48, 0.48, -0.05),
+    2: (-0.44, 0.47, 0.49),
+}
+HORIZONTAL_MAX_HEIGHT = (0.48, 0.54)  # 两行字的最大高度（画布高度的比例）
+
+VERTICAL_COLUMNS = {
+    # 列：(中心 x, 起点 y, 终点 y)
+    1: (0.27, -0.5, 0.4),
+    2: (-0.2, -0.3, 0.5),
+}
+VERTICAL_WEIGHT_SCALE = 0.46  # 竖排的字比横排小，与样例图的比例一致
+VERTICAL_MAX_WIDTH = 0.46  # 每列字的最大宽度（画布宽度的比例）
+
+GAP = 0.06  # 字与字之间的间距（占字高的比例）
+RECT_MARGIN = 0.98  # 方框边长相对方框字高的比例
+METRIC_SIZE = 1000  # 读取字体度量时用的字号，前进宽度除以它得到占字高的比例
+
+
+@lru_cache(maxsize=16)
+def _metric_font(font_path: str) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(font_path, METRIC_SIZE)
+
+
+@lru_cache(maxsize=1024)
+def glyph_advances(font_path: str, text: str) -> tuple[float, ...]:
+    """
+    每个字的前进宽度（占字高的比例），只读取字体的度量，不渲染字形
+    text1 不足两个字时补的空格是占位用的，按全角计算
+    """
+    font = _metric_font(font_path)
+    return tuple(1.0 if char == " " else font.getlength(char) / METRIC_SIZE for char in text)
+
+
+def _fit_line(weights: tuple[float, ...], along: tuple[float, ...], across: tuple[float, ...],
+              length: float, max_size: float, height: int) -> list[int]:
+    """
+    查找一个缩放系数，让一行字按 weights 的比例尽量大，同时不超出 length 和 max_size
+    每个字占用的尺寸 = 字高 × 度量比例，字间距按字高计算
+    :param weights: 每个字的相对大小
+    :param along: 每个字沿行方向的尺寸比例（横排为前进宽度，竖排为 1）
+    :param across: 每个字垂直于行方向的尺寸比例（横排为 1，竖排为前进宽度）
+    :param length: 这一行可用的长度（像素）
+    :param max_size: 单个字垂直于行方向的最大尺寸（像素）
+    :param height: 画布高度，字高 = int(weight * scale * height)
+    :return: 每个字的像素高度，至少 1 像素
+    """
+
+    def sizes(scale):
+        return [int(w * scale * height) for w in weights]
+
+    def fits(scale):
+        px = sizes(scale)
+        used = sum(p * a for p, a in zip(px, along)) + (sum(px) - px[-1]) * GAP
+        return max(p * c for p, c in zip(px, across)) <= max_size and used <= length
+
+    # 不取整时的最大缩放系数可以直接算出来，取整只会让字变小，所以它一定放得下；
+    # 每个字取整最多少 1 像素，由此得到放不下的上界，两者之间每种字只差一两个像素
+    per_scale = height * (sum(w * a for w, a in zip(weights, along)) + sum(weights[:-1]) * GAP)
+    slack = sum(along) + (len(weights) - 1) * GAP
+    # 前进宽度为 0 的字（如组合符号）不受 max_size 限制
+    low = min(length / per_scale, *(max_size / (w * c * height) for w, c in zip(weights, across) if c > 0))
+    high = min((length + slack) / per_scale,
+               *((max_size / c + 1) / (w * height) for w, c in zip(weights, across) if c > 0)) * (1 + 1e-9)
+    # 字高是整数，只有某个字的字高加 1 的那些缩放系数才需要检查，在这几个候选里二分
+    candidates = sorted({k / (w * height) * (1 + 1e-12) for w in set(weights)
+                         for k in range(int(w * low * height) + 1, int(w * high * height) + 1)})
+    first, last = 0, len(candidates)
+    while first < last:
+        middle = (first + last) // 2
+        if fits(candidates[middle]):
+            first = middle + 1
+        else:
+            last = middle
+    if first:
+        low = candidates[first - 1]
+    # 画布太小、字太多时字高可能取整成 0，字体不接受 0 号字，至少保留 1 像素
+    return [max(p, 1) for p in sizes(low)]
+
+
+@lru_cache(maxsize=256)
+def fit_layout(vertical: bool, len1: int, len2: int, width: int, height: int,
+               advances: tuple[float, ...] | None = None):
+    """
+    为 とある + text1 + の + text2 计算排版，返回相对画布中心的比例，由 layoutTemplates.compile_layout 换算成像素
+    结果只和方向、两段文字的长度、字的度量以及画布尺寸有关，会被缓存
+    :param advances: 每个字的前进宽度（见 glyph_advances），None 表示都按全角（正方形字框）计算
+    :return: (xy, size, rect)，rect 为 (方框宽比例, 方框高比例)
+    """
+    line1 = PREFIX_WEIGHTS + (TEXT1_WEIGHT,) * len1 + (NO_WEIGHT,)
+    line2 = (RECT_WEIGHT,) + (TEXT2_WEIGHT,) * (len2 - 1) if len2 else ()
+    if advances is None:
+        advances = (1.0,) * (len(line1) + len(line2))
+    metrics = (advances[:len(line1)], advances[len(line1):])
+    xy, size = [], []
+
+    def place(px, center_x, center_y):
+        xy.append((center_x / width - 0.5, center_y / height - 0.5))
+        # compile_layout 会取 int(height * size)，多加半个像素防止浮点误差少一像素
+        size.append((px + 0.5) / height)
+
+    if not vertical:
+        for line, adv, (start, end, bottom), max_h in zip((line1, line2), metrics, HORIZONTAL_ROWS.values(),
+                                                          HORIZONTAL_MAX_HEIGHT):
+            if not line:
+                continue
+            px = _fit_line(line, adv, (1.0,) * len(line), (end - start) * width, max_h * height, height)
+            # 整行在可用范围内居中，字的底边对齐
+            used = sum(p * a for p, a in zip(px, adv)) + (sum(px) - px[-1]) * GAP
+            x = (0.5 + (start + end) / 2) * width - used / 2
+            base_y = (0.5 + bottom) * height
+            for p, a in zip(px, adv):
+                place(p, x + p * a / 2, base_y - p / 2)
+                x += p * (a + GAP)
+    else:
+        for line, adv, (center_x, start, end) in zip((line1, line2), metrics, VERTICAL_COLUMNS.values()):
+            if not line:
+                continue
+            line = tuple(w * VERTICAL_WEIGHT_SCALE for w in line)
+            px = _fit_line(line, (1.0,) * len(line), adv, (end - start) * height, VERTICAL_MAX_WIDTH * width,
+                           height)
+            used = sum(px) * (1 + GAP) - px[-1] * GAP
+            y = (0.5 + (start + end) / 2) * height - used / 2
+            x = (0.5 + center_x) * width
+            for p in px:
+                place(p, x, y + p / 2)
+                y += p * (1 + GAP)
+
+    # 方框紧贴方框字（text2 的第一个字），没有 text2 时方框退化为 0
+    rect_px = size[len(line1)] * height * RECT_MARGIN if len2 else 0
+    rect = (rect_px / width, rect_px / height)
+    return tuple(xy), tuple(size), rect
@@ -0,0 +1,99 @@
+"""
+File: layoutTemplates.py
+Description: 排版模板：从 layouts/*.json 读取排版比例，按 (模板, 文字长度, 画布尺寸) 编译成像素坐标并缓存
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import json
+import os
+import sys
+from functools import lru_cache
+from typing import NamedTuple
+
+from layoutEngine import fit_layout
+from resource_path import resource_path
+
+TEMPLATE_VERSION = 1  # 当前支持的模板格式版本
+# 打包后从 _MEIPASS 里找，否则相对本文件所在目录，与当前工作目录无关
+if hasattr(sys, "_MEIPASS"):
+    LAYOUT_DIR = resource_path("layouts")
+else:
+    LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts")
+
+
+class CompiledLayout(NamedTuple):
+    """编译后的排版，全部是像素坐标"""
+    vertical: bool  # 小字是否竖排
+    glyphs: tuple[tuple[float, float, int], ...]  # 每个字的 (中心 x, 顶端 y, 字高)
+    rect: tuple[float, float, float, float] | None  # 方框 (left, top, right, bottom)，没有 text2 时为 None
+    small: tuple[int, int, int]  # 小字的 (中心 x, 中心 y, 字高)
+
+
+def list_templates() -> list[str]:
+    """layouts 目录下所有模板的名字"""
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(LAYOUT_DIR)
+                  if name.endswith(".json"))
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str) -> dict:
+    """
+    读取并检查排版模板
+    :param name: 模板名，对应 layouts/<name>.json
+    :return: 模板内容
+    """
+    path = os.path.join(LAYOUT_DIR, f"{name}.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            template = json.load(f)
+    except OSError as e:
+        raise ValueError(f"没找到排版模板 {name}。{e.args}")
+    if template.get("version") != TEMPLATE_VERSION:
+        raise ValueError(f"排版模板 {name} 的版本 {template.get('version')} 不受支持，需要 {TEMPLATE_VERSION}")
+    len1, len2 = template["lengths"]
+    # とある + text1 + の + text2
+    if len(template["glyphs"]) != 4 + len1 + len2:
+        raise ValueError(f"排版模板 {name} 的字数与 lengths 不符")
+    return template
+
+
+@lru_cache(maxsize=256)
+def compile_layout(name: str, len1: int, len2: int, width: int, height: int,
+                   advances: tuple[float, ...] | None = None) -> CompiledLayout:
+    """
+    把模板的比例换算成像素坐标，同一模板、文字长度、字的度量和画布尺寸只计算一次
+    文字长度与模板不同时，由 layoutEngine 自动排版
+    :param name: 模板名
+    :param len1: text1 的长度（补空格之后）
+    :param len2: text2 的长度
+    :param width: 画布宽度
+    :param height: 画布高度
+    :param advances: 每个字的前进宽度（layoutEngine.glyph_advances），只在自动排版时使用
+    """
+    template = load_template(name)
+    vertical = template["vertical"]
+    if (len1, len2) == tuple(template["lengths"]):
+        xy = [glyph["xy"] for glyph in template["glyphs"]]
+        size = [glyph["size"] for glyph in template["glyphs"]]
+        rect = template["rect"]
+    else:
+        xy, size, rect = fit_layout(vertical, len1, len2, width, height, advances)
+
+    # 画布很小时字高可能取整成 0，字体不接受 0 号字，至少保留 1 像素
+    glyphs = []
+    for (x, y), s in zip(xy, size):
+        char_height = max(int(height * s), 1)
+        glyphs.append((width / 2 + x * width, height / 2 + y * height - char_height / 2, char_height))
+
+    where_rect = 4 + len1
+    rect_box = None
+    if len2:
+        # 方框以方框字的中心为中心
+        x, y = xy[where_rect]
+        ax, ay = int(width / 2 + x * width), int(height / 2 + y * height)
+        rx, ry = rect[0] * width / 2, rect[1] * height / 2
+        rect_box = (ax - rx, ay - ry, ax + rx, ay + ry)
+
+    (sx, sy), small_size = template["small"]["xy"], template["small"]["size"]
+    small = (int(width / 2 + sx * width), int(height / 2 + sy * height), max(int(height * small_size), 1))
+    return CompiledLayout(vertical, tuple(glyphs), rect_box, small)
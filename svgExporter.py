@@ -0,0 +1,146 @@
+"""
+File: svgExporter.py
+Description: 直接用字体轮廓生成矢量（SVG）标题，任意尺寸缩放都不需要重新渲染
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import ImageColor
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.svgPathPen import SVGPathPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.ttLib import TTFont
+
+from layoutEngine import glyph_advances
+from layoutTemplates import compile_layout
+from titleGenerator import (TextType, Direction, magic_color, resolve_canvas, compose_text, template_name,
+                            gradient_range)
+
+
+def _ntos(value: float) -> str:
+    """坐标保留两位小数，去掉多余的 0，让文件更小"""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+@lru_cache(maxsize=8)
+def _load_font(font_path: str):
+    """
+    加载字体，返回 (glyph_set, cmap, units_per_em, ascender)
+    ttc 字体集默认取第一个字体，和 PIL 的 ImageFont.truetype 一致
+    """
+    try:
+        font = TTFont(font_path, fontNumber=0, lazy=True)
+    except Exception as e:
+        raise Exception(f"没找到这个字体。{e.args}")
+    return font.getGlyphSet(), font.getBestCmap(), font["head"].unitsPerEm, font["hhea"].ascent
+
+
+def _glyph_path(font_path: str, char: str, char_height: int, x: float, y: float,
+                center: bool = False) -> str:
+    """
+    把一个字的轮廓转换成 SVG path，摆放方式和 PIL 的 draw.text 一致
+    :param x: 画笔的 x 坐标；center 为 True 时表示字的水平中心
+    :param y: 字顶端（ascender）的 y 坐标
+    :param center: 是否按字形实际宽度水平居中
+    """
+    glyph_set, cmap, units_per_em, ascender = _load_font(font_path)
+    name = cmap.get(ord(char), ".notdef")
+    if name not in glyph_set:
+        return ""
+    glyph = glyph_set[name]
+    scale = char_height / units_per_em
+    if center:
+        bounds_pen = BoundsPen(glyph_set)
+        glyph.draw(bounds_pen)
+        if bounds_pen.bounds is None:  # 空格之类没有轮廓的字
+            return ""
+        x_min, _, x_max, _ = bounds_pen.bounds
+        x = int(x - (x_max - x_min) * scale / 2)
+    baseline = y + ascender * scale
+    svg_pen = SVGPathPen(glyph_set, ntos=_ntos)
+    # 字体坐标 y 轴向上，SVG 的 y 轴向下，需要翻转
+    glyph.draw(TransformPen(svg_pen, (scale, 0, 0, -scale, x, baseline)))
+    return svg_pen.getCommands()
+
+
+def generate_font_svg(text1: str = "", text2: str = "", text3: str = "", font_path: str = "",
+                      small_font_path: str = "",
+                      colors=None,
+                      width: int | None = None, height: int | None = None,
+                      angle: float | None = None, text_type: TextType = TextType.WHITE,
+                      direction=Direction.HORIZONTAL, template: str | None = None) -> str:
+    """
+    生成矢量版的魔禁风格标题，参数含义与 generate_font_image 相同
+    排版与 generate_font_image 使用同一份编译后的模板，width/height 只决定 viewBox，输出可以任意缩放
+    :return: SVG 文本
+    """
+    width, height, angle = resolve_canvas(direction, width, height, angle, template)
+    text, where_rect = compose_text(text1, text2)
+    layout = compile_layout(template_name(direction, template), where_rect - 4, len(text2), width, height,
+                            glyph_advances(font_path, text))
+
+    def char_path(i, char):
+        center_x, top, char_height = layout.glyphs[i]
+        return _glyph_path(font_path, char, char_height, center_x, int(top), center=True)
+
+    glyph_paths = [char_path(i, char) for i, char in enumerate(text) if i != where_rect]
+    has_rect = where_rect < len(text)  # 没有 text2 时没有方框
+    rect_char_path = char_path(where_rect, text[where_rect]) if has_rect else ""
+
+    # 小字 text3，排列方式与 generate_font_image 中的 draw_small_text 相同
+    if text3:
+        base_x, base_y, char_height = layout.small
+        n = len(text3)
+        total = char_height * n * 1.2
+        step = total / max(n - 1, 1)
+        for i, char in enumerate(text3):
+            if not layout.vertical:
+                x, y = int(base_x - total / 2 + i * step), int(base_y - char_height / 2)
+            else:
+                x, y = int(base_x - char_height / 2), int(base_y - total / 2 + i * step)
+            glyph_paths.append(_glyph_path(small_font_path, char, char_height, x, y))
+
+    # 渐变：offset = x * dx + y * dy 在 [min, max] 之间归一化，
+    # 等价于从 d * min 指向 d * max 的 userSpaceOnUse 线性渐变
+    dx, dy, min_offset, max_offset = gradient_range(width, height, angle)
+    if colors is None:
+        colors = magic_color
+    stops = "".join(
+        f'<stop offset="{_ntos(ratio)}" stop-color="#{"%02x%02x%02x" % ImageColor.getrgb(color)[:3]}"/>'
+        for color, ratio in sorted(colors, key=lambda s: s[1]))
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">',
+        '<defs>',
+        f'<linearGradient id="grad" gradientUnits="userSpaceOnUse" '
+        f'x1="{_ntos(dx * min_offset)}" y1="{_ntos(dy * min_offset)}" '
+        f'x2="{_ntos(dx * max_offset)}" y2="{_ntos(dy * max_offset)}">{stops}</linearGradient>',
+        # 方框里的字镂空：白色保留，黑色挖掉
+        f'<mask id="cut" maskUnits="userSpaceOnUse" x="0" y="0" width="{width}" height="{height}">'
+        f'<rect width="{width}" height="{height}" fill="#fff"/>'
+        f'<path d="{rect_char_path}" fill="#000"/></mask>',
+        '</defs>',
+        '<g fill="url(#grad)">',
+        f'<path d="{"".join(glyph_paths)}"/>',
+    ]
+    if has_rect:
+        left, top, right, bottom = layout.rect
+        parts.append(f'<rect x="{_ntos(left)}" y="{_ntos(top)}" width="{_ntos(right - left)}" '
+                     f'height="{_ntos(bottom - top)}" mask="url(#cut)"/>')
+    parts.append('</g>')
+    if has_rect and text_type in (TextType.WHITE, TextType.HARD_OUTFIT, TextType.SOFT_OUTFIT):
+        parts.append(f'<path d="{rect_char_path}" fill="#fff"/>')
+    parts.append(f'<title>{escape(text + text3)}</title>')
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+def save_font_svg(output_path: str, **kwargs):
+    """生成 SVG 并写入文件，kwargs 与 generate_font_svg 相同"""
+    svg = generate_font_svg(**kwargs)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    return output_path
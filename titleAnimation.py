@@ -0,0 +1,265 @@
+"""
+File: titleAnimation.py
+Description: 渐变扫动的动态标题（APNG / WebP / GIF），文字只绘制一次，帧按批次用 numpy 合成并流式写入
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import os
+import struct
+import zlib
+from enum import Enum
+from typing import Iterator
+
+import numpy as np
+import PIL
+from PIL import Image, GifImagePlugin
+
+from titleGenerator import (TextType, Direction, magic_color, resolve_canvas, render_text_mask, gradient_range,
+                            gradient_lut)
+
+LUT_SIZE = 1024  # 渐变查找表的精度
+
+
+class AnimationType(Enum):
+    """动画类型"""
+    ANGLE_SWEEP = 1  # 渐变角度旋转一周
+    COLOR_CYCLE = 2  # 渐变色沿渐变方向来回流动
+
+
+def build_lut(colors) -> np.ndarray:
+    """把渐变色预先插值成查找表，shape (LUT_SIZE, 3)"""
+    return gradient_lut(colors, LUT_SIZE)
+
+
+def iter_animation_batches(text1: str = "", text2: str = "", text3: str = "", font_path: str = "",
+                           small_font_path: str = "", colors=None,
+                           width: int | None = None, height: int | None = None, angle: float | None = None,
+                           text_type: TextType = TextType.WHITE, direction=Direction.HORIZONTAL,
+                           frames: int = 36, anim_type: AnimationType = AnimationType.ANGLE_SWEEP,
+                           batch_size: int = 8, template: str | None = None) -> Iterator[np.ndarray]:
+    """
+    按批次生成动态标题，参数含义与 generate_font_image 相同
+    :param frames: 总帧数，动画首尾相接
+    :param anim_type: 动画类型
+    :param batch_size: 每批合成多少帧，越大越快，但内存占用越高
+    :return: shape (n, height, width, 4) 的 uint8 数组的迭代器，内存只与 batch_size 有关，与总帧数无关
+    """
+    if frames < 1:
+        raise ValueError(f"动画至少需要 1 帧，当前为 {frames}")
+    width, height, angle = resolve_canvas(direction, width, height, angle, template)
+    # 文字只画一次，之后每一帧只换渐变
+    text_alpha, white_mask = render_text_mask(text1, text2, text3, font_path, small_font_path,
+                                              width, height, direction, text_type, template)
+    alpha = np.asarray(text_alpha)
+    lut = build_lut(colors if colors is not None else magic_color)
+    # 方框字的白色蒙版只涉及很少的像素，只在它的外接矩形里处理
+    white_box = white_mask.getbbox() if white_mask is not None else None
+    if white_box is not None:
+        white_crop = white_mask.crop(white_box)
+
+    # 只有文字覆盖的像素可见，渐变只在这些像素上计算，其余保持全透明
+    ys, xs = np.nonzero(alpha)
+    Y, X = ys.astype(np.float32), xs.astype(np.float32)
+    if anim_type == AnimationType.COLOR_CYCLE:
+        # 渐变首尾颜色不同，直接取模循环会出现一条从最亮跳到最暗的接缝；
+        # 接上一段倒过来的渐变，查找表首尾相接，颜色来回流动
+        lut = np.concatenate([lut, lut[::-1]])
+        dx, dy, min_offset, max_offset = gradient_range(width, height, angle)
+        base_idx = ((X * dx + Y * dy - min_offset) * ((LUT_SIZE - 1) / (max_offset - min_offset))).astype(np.int32)
+
+    for start in range(0, frames, batch_size):
+        ks = np.arange(start, min(start + batch_size, frames))
+        if anim_type == AnimationType.ANGLE_SWEEP:
+            ranges = np.array([gradient_range(width, height, angle + 360 * k / frames) for k in ks],
+                              dtype=np.float32)
+            dx, dy, min_offset, max_offset = (ranges[:, i, None] for i in range(4))
+            scale = (LUT_SIZE - 1) / (max_offset - min_offset)
+            idx = ((X * dx + Y * dy - min_offset) * scale).astype(np.int32)
+            np.clip(idx, 0, LUT_SIZE - 1, out=idx)
+        else:
+            shift = (ks * len(lut) // frames).astype(np.int32)[:, None]
+            idx = (base_idx - shift) % len(lut)
+
+        batch = np.zeros((len(ks), height, width, 4), dtype=np.uint8)
+        batch[:, ys, xs, :3] = lut[idx]
+        batch[..., 3] = alpha
+        del idx
+        if white_box is not None:
+            # 和 generate_font_image 一样用 Image.paste 混合白色，保证与静态图逐像素一致
+            # （透明像素直接取白色，而不是向白色线性混合，否则方框字周围会有一圈黑边）
+            left, top, right, bottom = white_box
+            for frame in batch:
+                region = Image.fromarray(frame[top:bottom, left:right], mode="RGBA")
+                region.paste((255, 255, 255, 255), (0, 0, right - left, bottom - top), mask=white_crop)
+                frame[top:bottom, left:right] = np.asarray(region)
+        yield batch
+
+
+def iter_animation_frames(**kwargs) -> Iterator[Image.Image]:
+    """逐帧生成动态标题，参数与 iter_animation_batches 相同，返回 RGBA 图片的迭代器"""
+    for batch in iter_animation_batches(**kwargs):
+        for frame in batch:
+            yield Image.fromarray(frame, mode="RGBA")
+
+
+def _png_chunk(fp, chunk_type: bytes, data: bytes):
+    fp.write(struct.pack(">I", len(data)) + chunk_type + data)
+    fp.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xffffffff))
+
+
+def _write_apng(fp, frames: Iterator[Image.Image], frame_count: int, duration: int, loop: int,
+                compress_level: int):
+    """
+    流式写 APNG：每帧压缩后立刻写入文件，不保留之前的帧
+    Pillow 的 APNG 编码器会把所有帧留在内存里做差分，所以这里自己写 chunk
+    """
+    seq = 0
+    fp.write(b"\x89PNG\r\n\x1a\n")
+    for i, frame in enumerate(frames):
+        width, height = frame.size
+        if i == 0:
+            # 8 位 RGBA，不隔行
+            _png_chunk(fp, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            _png_chunk(fp, b"acTL", struct.pack(">II", frame_count, loop))
+        # fcTL：整帧覆盖，dispose_op = 0，blend_op = 0（直接替换）
+        _png_chunk(fp, b"fcTL", struct.pack(">IIIIIHHBB", seq, width, height, 0, 0, duration, 1000, 0, 0))
+        seq += 1
+        # 每行前面加一个 filter 字节（0 = None）
+        raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+        raw[:, 1:] = np.asarray(frame).reshape(height, -1)
+        data = zlib.compress(raw.tobytes(), compress_level)
+        if i == 0:
+            _png_chunk(fp, b"IDAT", data)
+        else:
+            _png_chunk(fp, b"fdAT", struct.pack(">I", seq) + data)
+            seq += 1
+    _png_chunk(fp, b"IEND", b"")
+
+
+def _gif_palette(lut: np.ndarray) -> Image.Image:
+    """
+    GIF 所有帧共用一个全局调色板：198 个渐变色、8 条渐变色向白色的过渡（每条 7 级）、纯白，最后一个颜色留给透明
+    每一帧的颜色都来自查找表（以及方框字边缘和白色的混合），所以不需要逐帧量化出新的调色板
+    """
+    grad = lut[np.linspace(0, LUT_SIZE - 1, 198).astype(int)]
+    bases = lut[np.linspace(0, LUT_SIZE - 1, 8).astype(int)].astype(np.float32)
+    steps = np.arange(1, 8, dtype=np.float32)[None, :, None] / 8
+    ramps = (bases[:, None] + (255 - bases[:, None]) * steps).reshape(-1, 3).astype(np.uint8)
+    white, transparent = np.full((1, 3), 255, dtype=np.uint8), np.zeros((1, 3), dtype=np.uint8)
+    palette = np.concatenate([grad, ramps, white, transparent])
+    pal_img = Image.new("P", (1, 1))
+    pal_img.putpalette(palette.astype(np.uint8).tobytes())
+    return pal_img
+
+
+def _write_gif(fp, frames: Iterator[Image.Image], duration: int, loop: int, palette: Image.Image):
+    """流式写 GIF：所有帧共用全局调色板，逐帧量化后直接写入文件"""
+    transparency = 255
+    for i, frame in enumerate(frames):
+        alpha = np.asarray(frame.getchannel("A"))
+        p_frame = frame.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE)
+        # GIF 只有一位透明，alpha 不到一半的像素当作透明
+        p_arr = np.array(p_frame)
+        p_arr[alpha < 128] = transparency
+        p_frame = Image.fromarray(p_arr, mode="P")
+        p_frame.putpalette(palette.getpalette())
+        if i == 0:
+            header, _ = GifImagePlugin.getheader(p_frame, info={"loop": loop, "transparency": transparency})
+            for block in header:
+                fp.write(block)
+        # disposal = 2：下一帧绘制前先清空，否则透明部分会残留上一帧
+        for block in GifImagePlugin.getdata(p_frame, duration=duration, transparency=transparency, disposal=2):
+            fp.write(block)
+    fp.write(b";")
+
+
+# _FrameSequence 依赖 Image.Image 的内部属性 im / _mode / _size（Pillow 10.1 起 mode、size 才改成这两个属性），
+# 只在验证过的版本范围内使用，其他版本退回公开的 append_images 写法。requirements.txt 固定的是 11.1.0
+FRAME_SEQUENCE_PILLOW = ((11, 1), (13, 0))  # 验证过的 Pillow 版本 [11.1, 13)
+
+
+def _frame_sequence_supported() -> bool:
+    version = tuple(int(part) for part in PIL.__version__.split(".")[:2])
+    return FRAME_SEQUENCE_PILLOW[0] <= version < FRAME_SEQUENCE_PILLOW[1]
+
+
+class _FrameSequence(Image.Image):
+    """
+    把帧的迭代器包装成多帧图片（seek / tell / n_frames），Pillow 的 save_all 按顺序逐帧读取，
+    读到哪一帧才生成哪一帧，不会像 append_images 那样先把所有帧放进列表
+    注意：seek 直接替换 Pillow 的内部属性，只在 FRAME_SEQUENCE_PILLOW 范围内使用
+    """
+
+    def __init__(self, frames: Iterator[Image.Image], frame_count: int):
+        super().__init__()
+        self._frames = iter(frames)
+        self.n_frames = frame_count
+        self._index = -1
+        self.seek(0)
+
+    def seek(self, frame: int):
+        # save_all 结束时会 seek 回开始的那一帧，已经生成过的帧无法回退，忽略即可
+        if frame <= self._index:
+            return
+        if frame != self._index + 1:
+            raise EOFError("只能按顺序读取帧")
+        current = next(self._frames)
+        self.im = current.im
+        self._mode = current.mode
+        self._size = current.size
+        self._index = frame
+
+    def tell(self) -> int:
+        return self._index
+
+
+def _write_webp(fp, frames: Iterator[Image.Image], frame_count: int, duration: int, loop: int,
+                lossless: bool, quality: int):
+    """
+    写动态 WebP：通过 Pillow 的 save_all 接口交给 libwebp 的动画编码器
+    验证过的 Pillow 版本上逐帧流式生成，其他版本先把所有帧放进列表（内存与帧数成正比）
+    """
+    options = {"save_all": True, "duration": duration, "loop": loop, "lossless": lossless, "quality": quality}
+    if _frame_sequence_supported():
+        _FrameSequence(frames, frame_count).save(fp, "WEBP", **options)
+    else:
+        first, *rest = frames
+        first.save(fp, "WEBP", append_images=rest, **options)
+
+
+def save_animation(output_path: str, frames: int = 36, duration: int = 50, loop: int = 0,
+                   file_format: str | None = None, compress_level: int = 6, lossless: bool = True,
+                   quality: int = 80, **kwargs) -> str:
+    """
+    生成动态标题并写入文件
+    :param output_path: 输出路径
+    :param frames: 总帧数
+    :param duration: 每帧时长（毫秒）
+    :param loop: 循环次数，0 表示无限循环
+    :param file_format: "png"（APNG）、"webp" 或 "gif"，默认按文件后缀判断
+    :param compress_level: APNG 的 zlib 压缩等级
+    :param lossless: WebP 是否无损
+    :param quality: WebP 有损压缩质量
+    :param kwargs: 传给 iter_animation_frames 的参数
+    :return: 输出路径
+    """
+    if file_format is None:
+        file_format = os.path.splitext(output_path)[1].lstrip(".")
+    file_format = file_format.lower()
+    if file_format == "apng":
+        file_format = "png"
+    if file_format not in ("png", "webp", "gif"):
+        raise ValueError(f"不支持的动画格式：{file_format}")
+    # 在打开文件之前检查，0 帧时 APNG 会缺 IHDR、GIF 只剩结尾的 ";"
+    if frames < 1:
+        raise ValueError(f"动画至少需要 1 帧，当前为 {frames}")
+    stream = iter_animation_frames(frames=frames, **kwargs)
+    with open(output_path, "wb") as fp:
+        if file_format == "png":
+            _write_apng(fp, stream, frames, duration, loop, compress_level)
+        elif file_format == "webp":
+            _write_webp(fp, stream, frames, duration, loop, lossless, quality)
+        else:
+            palette = _gif_palette(build_lut(kwargs.get("colors") or magic_color))
+            _write_gif(fp, stream, duration, loop, palette)
+    return output_path
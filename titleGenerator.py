@@ -10,6 +10,8 @@ from enum import Enum
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from layoutEngine import glyph_advances
+from layoutTemplates import compile_layout, load_template
 from resource_path import resource_path
 
 
@@ -39,112 +41,99 @@ magic_color = [('#07098A', 0),('#07098A', 0.3), ('#3FAED4', 0.7), ('#3FAED4', 1)
 science_color = [('#E60020', 0), ('#E60020', 0.3),('#F29038', 0.7),('#F29038', 1)]
 
 
-def generate_font_image(text1: str = "", text2: str = "", text3: str = "", font_path: str = "",
-                        small_font_path: str = "",
-                        colors=None,
-                        width: int | None = None, height: int | None = None,
-                        angle:float|None=None, text_type: TextType = TextType.WHITE, bg_type: BgType = BgType.ALPHA,
-                        direction=Direction.HORIZONTAL, size_ratio: float = 1) -> Image.Image:
-    """
-    生成带有渐变蒙版的魔禁风格字体图片：
-    :param text1: 文本中间部分1，例如“學都”
-    :param text2: 文本中间部分2，例如“標題工房”
-    :param text3: 文本底下的小字
-    :param font_path: 字体文件路径
-    :param small_font_path: 小字体文件路径
-    :param colors: 渐变色列表，包含至少一个颜色和它们的比例，例如 [('#000000',0), ('#ffffff',100)]
-    :param width: 图片宽度，默认为 1937
-    :param height: 图片高度，默认为 1022
-    :param angle: 渐变角度，默认为 155 度
-    :param text_type: 字体描边类型，默认为 TextType.WHITE
-    :param bg_type: 背景类型，默认为 BgType.ALPHA
-    :param direction: 字体排列方向，默认为 Direction.HORIZONTAL
-    :param size_ratio: 字体大小比例，默认为 1，表示不缩放
-    :return: 生成的图片对象
-    """
-    # 创建一个透明背景，绘制黑色文字
+def template_name(direction: Direction, template: str | None = None) -> str:
+    """排版模板名，未指定时按方向使用 layouts/horizontal.json 或 layouts/vertical.json"""
+    return template if template is not None else direction.name.lower()
+
+
+def resolve_canvas(direction: Direction, width: int | None = None, height: int | None = None,
+                   angle: float | None = None, template: str | None = None) -> tuple[int, int, float]:
+    """补全画布尺寸和渐变角度的默认值，默认值来自排版模板"""
+    layout = load_template(template_name(direction, template))
     if width is None or height is None:
-        if direction == Direction.HORIZONTAL:
-            width, height = 1937, 1022
-        else:
-            width, height = 822, 1860
+        width, height = layout["canvas"]
     if angle is None:
-        if direction == Direction.HORIZONTAL:
-            angle = 155
-        else:
-            angle= 135
-    text_img = Image.new("RGBA", (width, height), (255, 255, 255, 0))
-    draw = ImageDraw.Draw(text_img)
-    try:
-        _ = ImageFont.truetype(font_path, 100)  # 测试字体加载
-    except Exception as e:
-        raise Exception(f"没找到这个字体。{e.args}")
+        angle = layout["angle"]
+    return width, height, angle
+
 
+def compose_text(text1: str, text2: str) -> tuple[str, int]:
+    """
+    拼出完整标题，并返回方框里那个字的下标
+    :return: (完整文本, 方框字下标)
+    """
     # 如果 text1 长度不足 2，则补空格
     if len(text1) < 2:
         if len(text1) == 0:
             text1 = "  "
         else:
             text1 = f'{text1} '
+    return f'とある{text1}の{text2}', 4 + len(text1)
+
+
+def gradient_range(width: int, height: int, angle: float) -> tuple[float, float, float, float]:
+    """
+    渐变方向向量和 offset = x * dx + y * dy 在画布上的取值范围
+    :return: (dx, dy, min_offset, max_offset)
+    """
+    angle_rad = math.radians(angle)
+    dx = math.sin(angle_rad)
+    dy = math.cos(angle_rad)
+    # offset 是线性的，极值一定落在四个角上
+    corners = [x * dx + y * dy for x in (0, width - 1) for y in (0, height - 1)]
+    return dx, dy, min(corners), max(corners)
+
+
+def render_text_mask(text1: str, text2: str, text3: str, font_path: str, small_font_path: str,
+                     width: int, height: int, direction=Direction.HORIZONTAL,
+                     text_type: TextType = TextType.WHITE,
+                     template: str | None = None) -> tuple[Image.Image, Image.Image | None]:
+    """
+    只绘制文字部分，得到文字图层的不透明度和方框字的白色蒙版
+    渐变与文字无关，动画等场景可以只画一次文字、反复合成渐变
+    :param template: 排版模板名，默认按方向选择
+    :return: (文字 alpha 通道, 方框字白色蒙版)，都是 L 模式；不需要填白时蒙版为 None
+    """
+    # 直接在 L 图层上画文字的不透明度：255 为文字，0 为透明，不需要先画一张 RGBA 再拆通道
+    text_alpha = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(text_alpha)
+    try:
+        _ = ImageFont.truetype(font_path, 100)  # 测试字体加载
+    except Exception as e:
+        raise Exception(f"没找到这个字体。{e.args}")
+
+    text, where_rect = compose_text(text1, text2)
+    # 排版已经按画布尺寸编译成像素坐标，这里只需要查表
+    layout = compile_layout(template_name(direction, template), where_rect - 4, len(text2), width, height,
+                            glyph_advances(font_path, text))
 
-    text = f'とある{text1}の{text2}'
-    len1, len2 = len(text1), len(text2)
-    where_rect = 4 + len1
-    # 定义每个字的相对中心坐标（相对于画布中心）和相对高度（占画布高度的比例）
-    if direction == Direction.HORIZONTAL:
-        xy = [(-0.4189, -0.2725), (-0.2630, -0.2079), (-0.1631, -0.2920),
-              (0.0100, -0.2607), (0.2235, -0.2162), (0.4091, -0.2118),
-              (-0.3170, 0.2392), (-0.0836, 0.1898), (0.1153, 0.1815),
-              (0.3273, 0.2255)]
-        size = [0.4471, 0.3023, 0.2084, 0.4784, 0.3757,
-                0.3297, 0.5000, 0.3992, 0.4099, 0.5430]
-        rx, ry = 0.258 * width / 2, 0.48 * height / 2
-        small_xy = [(0.014197212183789365, 0.45401174168297453)]
-        small_size = [0.09001956947162426]
-
-    else:
-        xy = [(0.2537, -0.4113), (0.3571, -0.2560),
-              (0.1655, -0.1974), (0.2695, -0.04839),
-              (0.2713, 0.1401), (0.2707, 0.3025),
-              (-0.2257, -0.1608), (-0.1429, 0.03468),
-              (-0.1758, 0.1928), (-0.2215, 0.3863),
-              (-0.2342, -0.1592)]
-        size = [0.22, 0.13, 0.12, 0.2, 0.19,
-                0.175, 0.22, 0.17, 0.18, 0.24,
-                0.26]
-        rx, ry = 0.5267 * width / 2, 0.2333 * height / 2
-        small_xy = [(-0.4586374695863747, 0.12123655913978494)]
-        small_size = [0.29838709677419356]
-
-    def draw_text(pen, i, word, color=(0, 0, 0, 255)):
+    def draw_text(pen, i, word, color=255):
         """写一个字符"""
-        char_height = int(height * size[i])
+        center_x, top, char_height = layout.glyphs[i]
         font = ImageFont.truetype(font_path, char_height)
         # 获取字符宽度
         char_bbox = font.getbbox(word)
         char_width = char_bbox[2] - char_bbox[0]
-        abs_x = int(width / 2 + xy[i][0] * width - char_width / 2)
-        abs_y = int(height / 2 + xy[i][1] * height - char_height / 2)
+        abs_x = int(center_x - char_width / 2)
+        abs_y = int(top)
         pen.text((abs_x, abs_y), word, font=font, fill=color)
 
     def draw_small_text(pen, text):
         """绘制小字 text3"""
         if not text:
             return
-        char_height = int(height * small_size[0])
+        base_x, base_y, char_height = layout.small
         font = ImageFont.truetype(small_font_path, char_height)
-        base_x = int(width / 2 + small_xy[0][0] * width)
-        base_y = int(height / 2 + small_xy[0][1] * height)
         n = len(text)
         # 根据方向决定排列
-        if direction == Direction.HORIZONTAL:
+        if not layout.vertical:
             total_width = char_height * n * 1.2
             start_x = base_x - total_width / 2
             step = total_width / max(n - 1, 1)
             for i, char in enumerate(text):
                 x = int(start_x + i * step)
                 y = int(base_y - char_height / 2)
-                pen.text((x, y), char, font=font, fill=(0, 0, 0, 255))
+                pen.text((x, y), char, font=font, fill=255)
 
         else:
             total_height = char_height * n * 1.2
@@ -155,38 +144,31 @@ def generate_font_image(text1: str = "", text2: str = "", text3: str = "", font_
             for i, char in enumerate(text):
                 x = int(base_x - char_height / 2)
                 y = int(start_y + i * step)
-                pen.text((x, y), char, font=font, fill=(0, 0, 0, 255))
+                pen.text((x, y), char, font=font, fill=255)
 
-
-    # 在 text_img 上绘制黑色文字
+    # 方框涂满，方框里的字挖空成透明
     for i, char in enumerate(text):
         if i == where_rect:
-            ax, ay = int(width / 2 + xy[i][0] * width), int(height / 2 + xy[i][1] * height)
-            draw.rectangle([ax - rx, ay - ry, ax + rx, ay + ry], fill=(0, 0, 0, 255))
-            draw_text(draw, i, char, color=(0, 0, 0, 0))
+            draw.rectangle(layout.rect, fill=255)
+            draw_text(draw, i, char, color=0)
         else:
             draw_text(draw, i, char)
     draw_small_text(draw, text3)
-    # 保存文字区域的不透明度
-    text_alpha = text_img.split()[3]  # 文字图层的 alpha 通道
 
-    # 生成渐变蒙版
-    # 使用 numpy 优化：创建灰度图（L 模式）作为渐变蒙版
-    indices = np.indices((height, width))
-    Y = indices[0].astype(np.float32)  # shape (height, width)
-    X = indices[1].astype(np.float32)
-    # 计算每个像素对应的 offset = x * dx + y * dy
-    angle_rad = math.radians(angle)
-    dx = math.sin(angle_rad)
-    dy = math.cos(angle_rad)
-    offset_arr = X * dx + Y * dy
-    min_offset = offset_arr.min()
-    max_offset = offset_arr.max()
-    # 归一化 factor 数组，范围 [0, 1]
-    factor_arr = (offset_arr - min_offset) / (max_offset - min_offset)
-    # 如果未指定 colors，则使用原有两色渐变
-    if colors is None:
-        colors = magic_color
+    # 方框里的字最后要填上白色，单独画一张覆盖度蒙版
+    # 没有 text2 时也就没有方框
+    white_mask = None
+    if where_rect < len(text) and text_type in (TextType.WHITE, TextType.HARD_OUTFIT, TextType.SOFT_OUTFIT):
+        white_mask = Image.new("L", (width, height), 0)
+        draw_text(ImageDraw.Draw(white_mask), where_rect, text[where_rect], color=255)
+    return text_alpha, white_mask
+
+
+def gradient_stops(colors):
+    """
+    把渐变色列表整理成按比例排序的 numpy 数组
+    :return: (stops_arr, r_stops, g_stops, b_stops)
+    """
     stops = sorted(colors, key=lambda s: s[1])
     # 构造 stops 数组
     stops_arr = np.array([s[1] for s in stops])
@@ -194,28 +176,168 @@ def generate_font_image(text1: str = "", text2: str = "", text3: str = "", font_
     # 对每个停靠点的颜色，取出 r, g, b 分量
     def get_rgb_arr(color_str):
         from PIL import ImageColor
-        r, g, b = ImageColor.getrgb(color_str)
+        r, g, b = ImageColor.getrgb(color_str)[:3]
         return r, g, b
 
     r_stops = np.array([get_rgb_arr(s[0])[0] for s in stops])
     g_stops = np.array([get_rgb_arr(s[0])[1] for s in stops])
     b_stops = np.array([get_rgb_arr(s[0])[2] for s in stops])
+    return stops_arr, r_stops, g_stops, b_stops
+
+
+def gradient_lut(colors, size: int) -> np.ndarray:
+    """把渐变色预先插值成查找表，第 i 项是 factor = i / (size - 1) 处的颜色，shape (size, 3)"""
+    stops_arr, r_stops, g_stops, b_stops = gradient_stops(colors)
+    t = np.linspace(0, 1, size)
+    return np.stack([np.interp(t, stops_arr, c) for c in (r_stops, g_stops, b_stops)], axis=-1).astype(np.uint8)
+
+
+def gradient_at(xs: np.ndarray, ys: np.ndarray, width: int, height: int, angle: float,
+                colors=None) -> np.ndarray:
+    """
+    计算指定像素的渐变色，渐变的起止始终按整张画布计算
+    :param xs: 像素的 x 坐标数组
+    :param ys: 像素的 y 坐标数组，形状与 xs 相同
+    :return: 形状为 xs.shape + (3,) 的 uint8 数组
+    """
+    # 计算每个像素对应的 offset = x * dx + y * dy
+    dx, dy, min_offset, max_offset = gradient_range(width, height, angle)
+    offset_arr = xs.astype(np.float32) * dx + ys.astype(np.float32) * dy
+    # 归一化 factor 数组，范围 [0, 1]
+    factor_arr = (offset_arr - min_offset) / (max_offset - min_offset)
+    # 如果未指定 colors，则使用原有两色渐变
+    if colors is None:
+        colors = magic_color
+    stops_arr, r_stops, g_stops, b_stops = gradient_stops(colors)
     # 对每个像素的 factor 进行线性插值，得到 r, g, b 数组
     r_interp = np.interp(factor_arr, stops_arr, r_stops).astype(np.uint8)
     g_interp = np.interp(factor_arr, stops_arr, g_stops).astype(np.uint8)
     b_interp = np.interp(factor_arr, stops_arr, b_stops).astype(np.uint8)
-    # 合成渐变图层数组（RGBA），alpha 固定为 255
-    gradient_arr = np.stack([r_interp, g_interp, b_interp, 255 * np.ones_like(r_interp, dtype=np.uint8)], axis=-1)
-    # 转换为 PIL 图片
-    gradient_img = Image.fromarray(gradient_arr, mode="RGBA")
+    return np.stack([r_interp, g_interp, b_interp], axis=-1)
+
+
+BAND_LUT_SIZE = 65535  # 低内存模式的渐变查找表精度，下标用 uint16，最后一项留给透明像素
+BAND_ROWS = 256  # 低内存模式每段最多的行数，再大也不会更快
+
+
+def band_row_bytes(width: int) -> int:
+    """低内存模式下每一行的临时内存：float32 offset、uint16 下标、uint8 RGBA、alpha（裁剪 + 数组）和透明标记"""
+    return width * (4 + 2 + 4 + 1 + 1 + 1)
+
+
+def plan_bands(width: int, height: int, max_bytes: int, white: bool) -> tuple[int, int]:
+    """
+    按内存预算规划低内存模式的分段
+    固定部分为输出图片、文字蒙版（L，每像素 1 字节）、方框字白色蒙版、查找表和一行 x 方向的系数，
+    蒙版在渲染渐变前就要画好，所以要在画蒙版之前检查
+    :param white: 是否有方框字白色蒙版
+    :return: (固定部分的字节数, 每段的行数)，预算不够时抛出 ValueError
+    """
+    fixed = width * height * (4 + 1 + (1 if white else 0)) + (BAND_LUT_SIZE + 1) * 4 + width * 4
+    band_rows = min(height, BAND_ROWS, (max_bytes - fixed) // band_row_bytes(width))
+    if band_rows < 1:
+        raise ValueError(f"内存预算 {max_bytes} 字节太小，{width}x{height} 至少需要 "
+                         f"{fixed + band_row_bytes(width)} 字节")
+    return fixed, band_rows
+
 
+def render_banded(text_alpha: Image.Image, white_mask: Image.Image | None, width: int, height: int,
+                  angle: float, colors, max_bytes: int) -> Image.Image:
+    """
+    低内存模式：按行分段计算渐变，直接写进输出图片
+    中间结果只用 uint8 / uint16 和可复用的缓冲区，每段最多 BAND_ROWS 行，预算不够时再减少行数
+    结果与默认模式最多相差 1（查找表的取整）
+    :param max_bytes: 内存预算（字节），包括输出图片、文字蒙版和分段缓冲区（见 plan_bands），不包括字体渲染的临时内存
+    :return: 生成的图片，info["peak_bytes"] 为估算的峰值内存，info["band_rows"] 为每段的行数
+    """
+    fixed, band_rows = plan_bands(width, height, max_bytes, white_mask is not None)
+    # 查找表多一项，透明像素指向这一项，取出的颜色是全 0，和默认模式一样
+    lut = np.zeros((BAND_LUT_SIZE + 1, 4), dtype=np.uint8)
+    lut[:BAND_LUT_SIZE, :3] = gradient_lut(colors if colors is not None else magic_color, BAND_LUT_SIZE)
+
+    # factor * (BAND_LUT_SIZE - 1) = x * col_term + y * row_scale + row_bias，x 方向的部分只算一次
+    dx, dy, min_offset, max_offset = gradient_range(width, height, angle)
+    scale = (BAND_LUT_SIZE - 1) / (max_offset - min_offset)
+    col_term = np.arange(width, dtype=np.float32) * np.float32(dx * scale)
+    offset = np.empty((band_rows, width), dtype=np.float32)
+    index = np.empty((band_rows, width), dtype=np.uint16)
+    band = np.empty((band_rows, width, 4), dtype=np.uint8)
+
+    out = Image.new("RGBA", (width, height))
+    for top in range(0, height, band_rows):
+        rows = min(band_rows, height - top)
+        o, i, b = offset[:rows], index[:rows], band[:rows]
+        alpha = np.asarray(text_alpha.crop((0, top, width, top + rows)))
+        row_term = (np.arange(top, top + rows, dtype=np.float32) * np.float32(dy) - np.float32(min_offset)) \
+            * np.float32(scale)
+        np.add(row_term[:, None], col_term[None, :], out=o)
+        np.clip(o, 0, BAND_LUT_SIZE - 1, out=o)
+        np.rint(o, out=o)
+        np.copyto(i, o, casting="unsafe")
+        np.putmask(i, alpha == 0, BAND_LUT_SIZE)
+        # 下标都在范围内，mode="clip" 让 take 直接写进 b，不再额外复制一份
+        np.take(lut, i, axis=0, out=b, mode="clip")
+        b[..., 3] = alpha
+        out.paste(Image.fromarray(b, mode="RGBA"), (0, top))
+    if white_mask is not None:
+        white_box = white_mask.getbbox()
+        if white_box is not None:
+            out.paste((255, 255, 255, 255), white_box, mask=white_mask.crop(white_box))
+    out.info["peak_bytes"] = fixed + band_rows * band_row_bytes(width)
+    out.info["band_rows"] = band_rows
+    return out
+
+
+def generate_font_image(text1: str = "", text2: str = "", text3: str = "", font_path: str = "",
+                        small_font_path: str = "",
+                        colors=None,
+                        width: int | None = None, height: int | None = None,
+                        angle:float|None=None, text_type: TextType = TextType.WHITE, bg_type: BgType = BgType.ALPHA,
+                        direction=Direction.HORIZONTAL, size_ratio: float = 1,
+                        template: str | None = None, max_bytes: int | None = None) -> Image.Image:
+    """
+    生成带有渐变蒙版的魔禁风格字体图片：
+    :param text1: 文本中间部分1，例如“學都”
+    :param text2: 文本中间部分2，例如“標題工房”
+    :param text3: 文本底下的小字
+    :param font_path: 字体文件路径
+    :param small_font_path: 小字体文件路径
+    :param colors: 渐变色列表，包含至少一个颜色和它们的比例，例如 [('#000000',0), ('#ffffff',100)]
+    :param width: 图片宽度，默认取排版模板的画布宽度（横排 1937）
+    :param height: 图片高度，默认取排版模板的画布高度（横排 1022）
+    :param angle: 渐变角度，默认取排版模板的角度（横排 155 度）
+    :param text_type: 字体描边类型，默认为 TextType.WHITE
+    :param bg_type: 背景类型，默认为 BgType.ALPHA
+    :param direction: 字体排列方向，默认为 Direction.HORIZONTAL
+    :param size_ratio: 字体大小比例，默认为 1，表示不缩放
+    :param template: 排版模板名（layouts 目录下的文件名），默认按方向选择
+    :param max_bytes: 内存预算（字节），指定时使用低内存模式（见 render_banded），峰值写在返回图片的 info["peak_bytes"]
+    :return: 生成的图片对象
+    """
+    width, height, angle = resolve_canvas(direction, width, height, angle, template)
+    if max_bytes is not None:
+        # 先按可能需要白色蒙版检查预算，预算不够时不必再画文字
+        plan_bands(width, height, max_bytes, text_type in (TextType.WHITE, TextType.HARD_OUTFIT, TextType.SOFT_OUTFIT))
+    text_alpha, white_mask = render_text_mask(text1, text2, text3, font_path, small_font_path,
+                                              width, height, direction, text_type, template)
+    if max_bytes is not None:
+        return render_banded(text_alpha, white_mask, width, height, angle, colors, max_bytes)
+    # 生成渐变蒙版
+    # 只有文字和方框覆盖的像素可见（通常只占画布的两成左右），渐变只在这些像素上计算，其余保持全透明
+    alpha_arr = np.asarray(text_alpha)
+    ys, xs = np.nonzero(alpha_arr)
+    gradient_arr = np.zeros((height, width, 4), dtype=np.uint8)
+    gradient_arr[ys, xs, :3] = gradient_at(xs, ys, width, height, angle, colors)
     # 将渐变图层的颜色应用到文字区域
     # 用文字的 alpha 作为蒙版，使渐变只在文字区域显示，并恢复原来的不透明度
-    gradient_img.putalpha(text_alpha)
-    last_draw = ImageDraw.Draw(gradient_img)
-
-    if text_type == TextType.WHITE or text_type == TextType.HARD_OUTFIT or text_type == TextType.SOFT_OUTFIT:
-        draw_text(last_draw, where_rect, text[where_rect], color=(255, 255, 255, 255))
+    gradient_arr[..., 3] = alpha_arr
+    # 转换为 PIL 图片
+    gradient_img = Image.fromarray(gradient_arr, mode="RGBA")
+    if white_mask is not None:
+        # 白色只覆盖方框里的一个字，只在它的外接矩形里混合
+        white_box = white_mask.getbbox()
+        if white_box is not None:
+            gradient_img.paste((255, 255, 255, 255), white_box, mask=white_mask.crop(white_box))
 
     # 返回最终生成的图片对象
     return gradient_img
@@ -237,5 +359,5 @@ if __name__ == "__main__":
                               font_path=resource_path("fonts/index.ttf"),
                               small_font_path=resource_path("fonts/YuGothB.ttc"),
                               colors=science_color,direction=Direction.HORIZONTAL)
-    img.save(output_path)
-    print(f"Image saved to: {output_path}")
+    from exporter import export_image
+    export_image(img, [output_path])
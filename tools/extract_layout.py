@@ -0,0 +1,447 @@
+"""
+File: extract_layout.py
+Description: 从样例标题图中自动提取每个字的方框，直接生成 layouts 下的排版模板（取代 measures.py 的手工取点）
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from layoutEngine import RECT_MARGIN  # noqa: E402
+from layoutTemplates import TEMPLATE_VERSION, load_template  # noqa: E402
+from titleGenerator import compose_text  # noqa: E402
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+def foreground_mask(img: Image.Image, threshold: int = 128) -> np.ndarray:
+    """
+    前景二值图：有透明通道时按 alpha 判断，否则按与背景色（取四个角的中位数）的差异判断
+    :return: bool 数组，shape (height, width)
+    """
+    if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+        alpha = np.asarray(img.convert("RGBA"))[..., 3]
+        if alpha.min() < 255:
+            return alpha >= threshold
+    rgb = np.asarray(img.convert("RGB")).astype(np.int16)
+    corners = np.stack([rgb[0, 0], rgb[0, -1], rgb[-1, 0], rgb[-1, -1]])
+    background = np.median(corners, axis=0)
+    return np.abs(rgb - background).max(axis=-1) >= threshold // 2
+
+
+def dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """方形结构元的膨胀，用错位取 max 实现（先横向后纵向，共 O(radius) 次数组运算）"""
+    if radius <= 0:
+        return mask
+    out = mask.copy()
+    for shift in range(1, radius + 1):
+        out[:, shift:] |= mask[:, :-shift]
+        out[:, :-shift] |= mask[:, shift:]
+    rows = out.copy()
+    for shift in range(1, radius + 1):
+        out[shift:] |= rows[:-shift]
+        out[:-shift] |= rows[shift:]
+    return out
+
+
+def connected_components(n: int, pairs_a: np.ndarray, pairs_b: np.ndarray) -> np.ndarray:
+    """
+    无向图的连通分量：每轮把相连两点的标签取最小值，再让每个标签指向它的标签（指针跳跃），直到不再变化
+    :param n: 点数
+    :param pairs_a: 边的一端
+    :param pairs_b: 边的另一端
+    :return: 每个点所属分量的编号（0 ~ 分量数-1）
+    """
+    labels = np.arange(n)
+    while True:
+        smaller = np.minimum(labels[pairs_a], labels[pairs_b])
+        updated = labels.copy()
+        np.minimum.at(updated, pairs_a, smaller)
+        np.minimum.at(updated, pairs_b, smaller)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def union_boxes(boxes: np.ndarray, component: np.ndarray) -> np.ndarray:
+    """把属于同一分量的外框合并成一个，boxes 每行是 (left, top, right, bottom)"""
+    merged = np.empty((component.max(initial=-1) + 1, 4), dtype=boxes.dtype)
+    merged[:, :2] = np.iinfo(np.int64).max
+    merged[:, 2:] = np.iinfo(np.int64).min
+    np.minimum.at(merged[:, 0], component, boxes[:, 0])
+    np.minimum.at(merged[:, 1], component, boxes[:, 1])
+    np.maximum.at(merged[:, 2], component, boxes[:, 2])
+    np.maximum.at(merged[:, 3], component, boxes[:, 3])
+    return merged
+
+
+def label_boxes(mask: np.ndarray) -> np.ndarray:
+    """
+    连通域标记（8 邻域），返回每个连通域的外接框
+    先把每行拆成连续的游程，再把相邻两行中有重叠的游程连起来，最后用指针跳跃求连通分量，
+    全部是 numpy 数组运算，没有逐像素的 Python 循环
+    :return: shape (n, 4) 的数组，每行是 (left, top, right, bottom)，right/bottom 不包含
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    diff = np.diff(padded, axis=1)
+    # 两次 nonzero 都按行优先排序，同一行里的游程起点和终点一一对应
+    rows, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)  # ends 不包含
+    n = len(starts)
+    if n == 0:
+        return np.zeros((0, 4), dtype=np.int64)
+
+    # 相邻行的游程 a（第 r 行）与 b（第 r+1 行）在 8 邻域下相连：a.start <= b.end 且 b.start <= a.end
+    row_first = np.searchsorted(rows, np.arange(height + 1))
+    below_first = row_first[rows + 1]
+    below_last = row_first[np.minimum(rows + 2, height)]
+    # 每个游程依次和下一行的第 0、1、2…… 个游程比较，循环次数只取决于一行里最多有几段
+    pairs_a, pairs_b = [], []
+    for offset in range(int((below_last - below_first).max(initial=0))):
+        b = below_first + offset
+        valid = b < below_last
+        a_idx = np.nonzero(valid)[0]
+        b_idx = b[valid]
+        touch = (starts[a_idx] <= ends[b_idx]) & (starts[b_idx] <= ends[a_idx])
+        pairs_a.append(a_idx[touch])
+        pairs_b.append(b_idx[touch])
+    pairs_a = np.concatenate(pairs_a) if pairs_a else np.zeros(0, dtype=np.int64)
+    pairs_b = np.concatenate(pairs_b) if pairs_b else np.zeros(0, dtype=np.int64)
+
+    component = connected_components(n, pairs_a, pairs_b)
+    return union_boxes(np.stack([starts, rows, ends, rows + 1], axis=1), component)
+
+
+def find_rect(mask: np.ndarray, min_side: int) -> tuple[int, int, int, int] | None:
+    """
+    找出方框（text2 第一个字的实心底框）：四条边都是前景、边长不小于 min_side、大半涂满的最大矩形
+    方框左右两侧没有被方框字穿过的那些列，前景都恰好从方框顶端连到底端，所以先按列求竖直游程，
+    找出起止行相同、且足够长的一组列，再检查顶边和底边是否（几乎）整行都是前景，镂空的方框字可能穿过一小段边
+    笔画本身也是实心矩形，但总有一边很窄，达不到 min_side；口 这类空心的字框里面大半是空的
+    :return: (left, top, right, bottom)，right/bottom 不包含；没有找到时返回 None
+    """
+    height, width = mask.shape
+    padded = np.zeros((height + 2, width), dtype=np.int8)
+    padded[1:-1] = mask
+    diff = np.diff(padded, axis=0).T
+    # 转置后按列优先排序，同一列的游程起点和终点一一对应
+    columns, tops = np.nonzero(diff == 1)
+    _, bottoms = np.nonzero(diff == -1)
+    long = bottoms - tops >= min_side
+    columns, tops, bottoms = columns[long], tops[long], bottoms[long]
+    if len(columns) == 0:
+        return None
+    spans, group = np.unique(tops * (height + 1) + bottoms, return_inverse=True)
+    best = None
+    for index in np.argsort(-np.bincount(group)):
+        top, bottom = divmod(int(spans[index]), height + 1)
+        cols = columns[group == index]
+        left, right = int(cols.min()), int(cols.max()) + 1
+        if right - left < min_side or min(mask[top, left:right].mean(), mask[bottom - 1, left:right].mean()) < 0.8:
+            continue
+        if mask[top:bottom, left:right].mean() < 0.5:
+            continue
+        if best is None or (right - left) * (bottom - top) > (best[2] - best[0]) * (best[3] - best[1]):
+            best = (left, top, right, bottom)
+    return best
+
+
+def line_cut(profile: np.ndarray, start: int, stop: int) -> int:
+    """在 profile[start:stop] 里取前景最少的位置作为两行（列）的分界，最少的位置有好几个时取它们的中间"""
+    start, stop = max(start, 0), min(stop, len(profile))
+    window = profile[start:stop]
+    lowest = np.nonzero(window == window.min())[0]
+    return start + int(lowest[len(lowest) // 2])
+
+
+def group_glyphs(boxes: np.ndarray, axis: int, count: int, min_extent: float,
+                 same_glyph: float = 0.5, max_gap: float = 0.25, max_aspect: float = 1.5) -> tuple[np.ndarray, np.ndarray]:
+    """
+    把一行里的连通域按排列方向合并成 count 个字
+    同一个字被拆开的部件（學 的上下两半、房 的头一横）在排列方向上的投影几乎重合，相邻的字只会嵌进去一角，
+    所以每次合并投影重合比例最大的两个：重合超过较窄者 same_glyph 倍的一定是同一个字，不论字数都要合并；
+    其余的按需合并到剩下 count 个，部件之间的空隙超过较窄者 max_gap 倍、或者合并后沿排列方向比另一边长 max_aspect 倍
+    （两个字连在一起的形状）时不再合并
+    尺寸小于 min_extent 的连通域不参与合并：中心落在某个字外框里的是这个字的点，其余的留给调用方当作小字
+    :param boxes: 这一行的连通域外框 (left, top, right, bottom)
+    :param axis: 排列方向，0 为横排（沿 x），1 为竖排（沿 y）
+    :return: (按排列方向排序的 count 个字的外框, 没有归属的小连通域)，字数对不上时抛出 ValueError
+    """
+    extent = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1])
+    glyphs = [box for box in boxes[extent >= min_extent]]
+    small = boxes[extent < min_extent]
+    while len(glyphs) > 1:
+        best, pair = None, None
+        for i in range(len(glyphs)):
+            for j in range(i + 1, len(glyphs)):
+                a, b = glyphs[i], glyphs[j]
+                overlap = min(a[axis + 2], b[axis + 2]) - max(a[axis], b[axis])
+                ratio = overlap / min(a[axis + 2] - a[axis], b[axis + 2] - b[axis])
+                if best is None or ratio > best:
+                    best, pair = ratio, (i, j)
+        i, j = pair
+        merged = np.concatenate([np.minimum(glyphs[i][:2], glyphs[j][:2]), np.maximum(glyphs[i][2:], glyphs[j][2:])])
+        along, across = merged[axis + 2] - merged[axis], merged[3 - axis] - merged[1 - axis]
+        if best < same_glyph and (len(glyphs) <= count or best < -max_gap or along > across * max_aspect):
+            break
+        glyphs[i] = merged
+        glyphs.pop(j)
+    if len(glyphs) < count:
+        raise ValueError(f"识别出 {len(glyphs)} 个字，应为 {count} 个：有字粘连在一起（--merge 太大时也会这样）")
+    if len(glyphs) > count:
+        raise ValueError(f"识别出 {len(glyphs)} 个字，应为 {count} 个：多出来的部件不像哪个字的一部分（样例图有噪点时可以调大 --merge）")
+    glyphs = np.array(sorted(glyphs, key=lambda box: box[axis] + box[axis + 2]), dtype=np.int64).reshape(-1, 4)
+
+    # 中心落在某个字外框里的小连通域是这个字的点、浊点之类
+    if len(small):
+        cx, cy = (small[:, 0] + small[:, 2]) / 2, (small[:, 1] + small[:, 3]) / 2
+        inside = ((cx[:, None] >= glyphs[None, :, 0]) & (cx[:, None] < glyphs[None, :, 2])
+                  & (cy[:, None] >= glyphs[None, :, 1]) & (cy[:, None] < glyphs[None, :, 3]))
+        owner = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+        absorbed = owner >= 0
+        np.minimum.at(glyphs[:, 0], owner[absorbed], small[absorbed, 0])
+        np.minimum.at(glyphs[:, 1], owner[absorbed], small[absorbed, 1])
+        np.maximum.at(glyphs[:, 2], owner[absorbed], small[absorbed, 2])
+        np.maximum.at(glyphs[:, 3], owner[absorbed], small[absorbed, 3])
+        small = small[~absorbed]
+    return glyphs, small
+
+
+def rect_glyph_mask(img: Image.Image, mask: np.ndarray, rect: tuple[int, int, int, int]) -> np.ndarray:
+    """
+    方框字在方框里的墨迹：镂空时是方框里透明（背景）的部分，填白时是比方框颜色亮得多的部分
+    方框本身接近白色时分不出填白的字，返回的墨迹只有镂空的部分（可能为空）
+    """
+    left, top, right, bottom = rect
+    glyph = ~mask[top:bottom, left:right]
+    lowest = np.asarray(img.convert("RGB"))[top:bottom, left:right].min(axis=-1).astype(np.int16)
+    # 方框边上的颜色就是方框的颜色；渐变时取较亮的地方，方框字穿过的一小段边不算
+    box_level = np.percentile(np.concatenate([lowest[0], lowest[-1], lowest[:, 0], lowest[:, -1]]), 90)
+    if box_level < 224:
+        glyph |= mask[top:bottom, left:right] & (lowest > (255 + box_level) / 2)
+    return glyph
+
+
+def ink_metrics(font: ImageFont.FreeTypeFont, char: str) -> tuple[tuple[int, int, int, int], int]:
+    """
+    字在 font.size 号字下的墨迹外框（相对画笔位置）和 getbbox 的宽度
+    titleGenerator.draw_text 按 getbbox 的宽度居中，而 getbbox 不一定是墨迹的外框（与 Pillow 版本和排版引擎有关），
+    所以墨迹外框要实际画出来量
+    """
+    size = font.size
+    canvas = Image.new("L", (size * 3, size * 3), 0)
+    ImageDraw.Draw(canvas).text((size, size), char, font=font, fill=255)
+    ink = canvas.point(lambda v: 255 if v >= 128 else 0).getbbox() or (size, size, size, size)
+    bbox = font.getbbox(char)
+    return (ink[0] - size, ink[1] - size, ink[2] - size, ink[3] - size), bbox[2] - bbox[0]
+
+
+def em_box(ink: np.ndarray, char: str | None, font: ImageFont.FreeTypeFont | None,
+           bounds: tuple[int, int, int, int]) -> tuple[float, float, float]:
+    """
+    把一个字的墨迹外框换算成排版模板里的 (中心 x, 中心 y, 字高)，单位是像素
+    有字体时按 titleGenerator.render_text_mask 的画法反推：字号按墨迹与同一个字在参考字号下的墨迹之比求出，
+    水平方向画笔位置 = 中心 - getbbox 宽度 / 2，竖直方向从排版框的顶端开始画
+    没有字体时只能用墨迹外框近似，字高会比实际字号小一些
+    :param bounds: 墨迹可能被截断的范围 (left, top, right, bottom)：普通的字是画布，方框字是方框
+    """
+    left, top, right, bottom = (float(v) for v in ink)
+    if font is None or char is None or char.isspace():
+        return (left + right) / 2, (top + bottom) / 2, bottom - top
+    (ix0, iy0, ix1, iy1), advance = ink_metrics(font, char)
+    # 用墨迹更长、且没有被画布边缘截断的一边求字号，抗锯齿带来的一像素误差影响最小
+    b_left, b_top, b_right, b_bottom = bounds
+    clip_left, clip_right = left <= b_left, right >= b_right
+    clip_top, clip_bottom = top <= b_top, bottom >= b_bottom
+    sides = [(right - left, ix1 - ix0, clip_left or clip_right), (bottom - top, iy1 - iy0, clip_top or clip_bottom)]
+    sides.sort(key=lambda side: (side[2], -side[0]))
+    measured, reference, _ = sides[0]
+    scale = measured / max(reference, 1)
+    size = font.size * scale
+    # 被画布截断的字从没截断的一侧推算画笔位置
+    pen_x = left - ix0 * scale if not clip_left else right - ix1 * scale
+    pen_y = top - iy0 * scale if not clip_top else bottom - iy1 * scale
+    return pen_x + advance * scale / 2, pen_y + size / 2, size
+
+
+def extract_layout(img: Image.Image, lengths: tuple[int, int] | None = None, text: tuple[str, str] | None = None,
+                   font_path: str | None = None, vertical: bool | None = None, merge_ratio: float = 0.0,
+                   small_ratio: float = 0.3, name: str = "") -> dict:
+    """
+    从一张样例图中提取排版模板
+    先找出方框，在方框和第一行之间前景最少的地方把两行（列）分开，再在每一行里各自求连通域，
+    按预期的字数合并成字；识别出的字数与预期不符时直接报错，不会写出错误的模板
+    :param img: 样例图（透明背景或纯色背景）
+    :param lengths: text1、text2 的长度，例如 (2, 4)；给了 text 时可以省略
+    :param text: 样例图上的 (text1, text2)，用来确定长度，配合 font_path 换算字号
+    :param font_path: 渲染样例图时用的字体；给出时按字形外框把墨迹换算成字号，否则字高取墨迹高度
+    :param vertical: 是否竖排，默认按宽高比判断
+    :param merge_ratio: 膨胀半径（占画布短边的比例），样例图有噪点或压缩痕迹时用来把碎块连起来，要小于字间距的一半
+    :param small_ratio: 尺寸小于方框这个比例的当作小字（text3）或者字里的点
+    :param name: 模板名
+    :return: 可以直接写成 layouts/*.json 的模板
+    """
+    chars = None
+    if font_path and text is None:
+        raise ValueError("按字体换算字号需要知道每个位置是哪个字，请同时给出 text")
+    if text is not None:
+        full, where_rect = compose_text(*text)
+        lengths = (where_rect - 4, len(full) - where_rect)
+        chars = full
+    if lengths is None:
+        raise ValueError("需要给出 text1、text2 的长度（或文字本身），才能检查识别结果")
+    len1, len2 = lengths
+    if len1 < 2 or len2 < 1:
+        # text1 不足两个字时补的是空格，样例图上看不到
+        raise ValueError(f"长度 {len1} + {len2} 无法提取：text1 至少 2 个字，text2 至少 1 个字")
+    font = ImageFont.truetype(font_path, 1000) if font_path else None
+
+    width, height = img.size
+    if vertical is None:
+        vertical = height > width
+    mask = foreground_mask(img)
+    rect = find_rect(mask, int(min(width, height) * 0.2))
+    if rect is None:
+        raise ValueError("图中没有找到方框（text2 第一个字的实心底框）")
+    r_left, r_top, r_right, r_bottom = rect
+
+    # 横排：上面一行是 とある+text1+の，下面一行是 text2，分界在方框上方半个方框以内；
+    # 竖排：右边一列在前，左边一列在后，分界在方框右侧半个方框以内
+    axis = 1 if vertical else 0
+    if vertical:
+        cut = line_cut(mask.sum(axis=0), r_right, r_right + (r_right - r_left) // 2)
+        first, second = mask.copy(), mask.copy()
+        first[:, :cut] = False
+        second[:, cut:] = False
+    else:
+        cut = line_cut(mask.sum(axis=1), r_top - (r_bottom - r_top) // 2, r_top)
+        first, second = mask.copy(), mask.copy()
+        first[cut:] = False
+        second[:cut] = False
+    # 去掉方框，贴着方框的字（例如 標題 的 題）就和方框分开了
+    rect_glyph = rect_glyph_mask(img, mask, rect)
+    second[r_top:r_bottom, r_left:r_right] = False
+
+    # 在膨胀后的图上求连通域，膨胀让外框每边多出 radius，再收回去
+    radius = max(int(min(width, height) * merge_ratio), 0)
+    min_extent = max(r_right - r_left, r_bottom - r_top) * small_ratio
+    lines = []
+    for index, (band, count) in enumerate(((first, 4 + len1), (second, len2 - 1))):
+        boxes = label_boxes(dilate(band, radius))
+        boxes[:, :2] = np.maximum(boxes[:, :2] + radius, 0)
+        boxes[:, 2] = np.minimum(boxes[:, 2] - radius, width)
+        boxes[:, 3] = np.minimum(boxes[:, 3] - radius, height)
+        try:
+            lines.append(group_glyphs(boxes, axis, count, min_extent))
+        except ValueError as e:
+            raise ValueError(f"第 {index + 1} 行（列）{e.args[0]}（预期长度 {len1} + {len2}）")
+    (glyphs1, small1), (glyphs2, small2) = lines
+    small_boxes = np.concatenate([small1, small2])
+    # 贴着方框的碎块是方框字露出框外的部分，不是小字
+    touching = ((small_boxes[:, 0] <= r_right) & (small_boxes[:, 2] >= r_left)
+                & (small_boxes[:, 1] <= r_bottom) & (small_boxes[:, 3] >= r_top))
+    small_boxes = small_boxes[~touching]
+
+    def glyph_entry(index, ink, bounds=(0, 0, width, height)):
+        cx, cy, size = em_box(ink, chars[index] if chars else None, font, bounds)
+        return {"xy": [round(cx / width - 0.5, 4), round(cy / height - 0.5, 4)], "size": round(size / height, 4)}
+
+    entries = [glyph_entry(i, ink) for i, ink in enumerate(glyphs1)]
+    # 方框字：镂空或填白时都能看到它的墨迹，分辨不出时按方框的大小估计（方框边长 = 字高 × RECT_MARGIN）
+    box_index = 4 + len1
+    if rect_glyph.any():
+        ys, xs = np.nonzero(rect_glyph)
+        ink = np.array([xs.min() + r_left, ys.min() + r_top, xs.max() + 1 + r_left, ys.max() + 1 + r_top])
+        entry = glyph_entry(box_index, ink, rect)
+    else:
+        entry = {"size": round((r_bottom - r_top) / RECT_MARGIN / height, 4)}
+    # 方框以方框字的中心为中心
+    entry["xy"] = [round((r_left + r_right) / 2 / width - 0.5, 4), round((r_top + r_bottom) / 2 / height - 0.5, 4)]
+    entries.append(entry)
+    entries += [glyph_entry(box_index + 1 + i, ink) for i, ink in enumerate(glyphs2)]
+
+    template = {
+        "version": TEMPLATE_VERSION,
+        "name": name,
+        "description": f"由 tools/extract_layout.py 从 {width}x{height} 的样例图提取",
+        "vertical": bool(vertical),
+        "canvas": [width, height],
+        "angle": 135 if vertical else 155,
+        "lengths": [len1, len2],
+        "glyphs": entries,
+        "rect": [round((r_right - r_left) / width, 4), round((r_bottom - r_top) / height, 4)],
+    }
+    if len(small_boxes):
+        left, top = (int(v) for v in small_boxes[:, :2].min(axis=0))
+        right, bottom = (int(v) for v in small_boxes[:, 2:].max(axis=0))
+        # 小字的字高：横排取整体高度，竖排取整体宽度
+        char_size = (right - left) if vertical else (bottom - top)
+        template["small"] = {"xy": [round((left + right) / 2 / width - 0.5, 4),
+                                    round((top + bottom) / 2 / height - 0.5, 4)],
+                             "size": round(char_size / height, 4)}
+    else:
+        # 样例图里没有小字，沿用同方向内置模板的位置
+        template["small"] = load_template("vertical" if vertical else "horizontal")["small"]
+    return template
+
+
+def extract_folder(src: str, out_dir: str, **kwargs) -> list[str]:
+    """
+    处理一个文件夹（或单个文件）里的所有样例图，每张图生成一个同名的 json 模板
+    模板名就是文件名（不含扩展名），所以 title.png 和 title.jpg 这样同名的样例图会直接报错，一个文件都不写
+    :return: 生成的模板路径
+    """
+    if os.path.isdir(src):
+        paths = sorted(os.path.join(src, f) for f in os.listdir(src) if f.lower().endswith(IMAGE_EXTS))
+    else:
+        paths = [src]
+    # 不区分大小写：Windows 和 macOS 上 Title.json 和 title.json 是同一个文件
+    stems = {}
+    for path in paths:
+        stems.setdefault(os.path.splitext(os.path.basename(path))[0].lower(), []).append(os.path.basename(path))
+    duplicates = [names for names in stems.values() if len(names) > 1]
+    if duplicates:
+        raise ValueError("以下样例图会生成同名的模板，请重命名后再提取：" +
+                         "；".join("、".join(names) for names in duplicates))
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = []
+    for path in paths:
+        start = time.perf_counter()
+        stem = os.path.splitext(os.path.basename(path))[0]
+        with Image.open(path) as img:
+            template = extract_layout(img, name=stem, **kwargs)
+        output_path = os.path.join(out_dir, f"{stem}.json")
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(template, f, ensure_ascii=False, indent=2)
+        print(f"{path} -> {output_path}，{len(template['glyphs'])} 个字，"
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        outputs.append(output_path)
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从样例标题图中提取排版模板")
+    parser.add_argument("src", help="样例图或样例图所在的文件夹")
+    parser.add_argument("-o", "--out", default="layouts", help="模板输出目录，默认 layouts")
+    parser.add_argument("--vertical", action="store_true", default=None, help="强制按竖排处理")
+    parser.add_argument("--horizontal", dest="vertical", action="store_false", help="强制按横排处理")
+    parser.add_argument("--merge", type=float, default=0.0, help="膨胀半径（占短边的比例），样例图有噪点时可以调大，要小于字间距的一半")
+    expected = parser.add_mutually_exclusive_group(required=True)
+    expected.add_argument("--lengths", type=int, nargs=2, metavar=("LEN1", "LEN2"),
+                          help="样例图上 text1、text2 的字数，例如 --lengths 2 4，识别出的字数不符时报错")
+    expected.add_argument("--text", nargs=2, metavar=("TEXT1", "TEXT2"), help="样例图上的 text1、text2，例如 --text 學都 標題工房")
+    parser.add_argument("--font", help="渲染样例图时用的字体，和 --text 一起给出时按字形外框换算出准确的字号")
+    args = parser.parse_args()
+    extract_folder(args.src, args.out, lengths=args.lengths, text=args.text, font_path=args.font,
+                   vertical=args.vertical, merge_ratio=args.merge)
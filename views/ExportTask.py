@@ -0,0 +1,38 @@
+"""
+File: ExportTask.py
+Description: 在线程池中导出图片，完成后通过信号通知 GUI 线程
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from exporter import ExportProfile, export_image
+
+
+class _ExportSignals(QObject):
+    finished = pyqtSignal(list)  # list[ExportResult]
+    failed = pyqtSignal(str)
+
+
+class ExportTask(QRunnable):
+    """后台执行 export_image，避免编码大图时界面卡住"""
+
+    def __init__(self, img, paths, profile=ExportProfile.BALANCED, trim=False):
+        super().__init__()
+        # 复制一份，导出过程中重新生成图片也不受影响；export_image 自己不再复制，整个导出只有这一份副本
+        self.img = img.copy()
+        self.paths = paths
+        self.profile = profile
+        self.trim = trim
+        self.signals = _ExportSignals()
+
+    def run(self):
+        try:
+            results = export_image(self.img, self.paths, self.profile, self.trim, report=None)
+        except Exception as e:
+            self.signals.failed.emit(str(e.args))
+        else:
+            self.signals.finished.emit(results)
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
@@ -0,0 +1,91 @@
+"""
+File: ImageLoader.py
+Description: 在后台线程中按预览尺寸缩放解码图片，并缓存解码后的缩略图
+Author: Misaka-xxw
+Created: 2026-10-19
+"""
+import os
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader
+
+PREVIEW_SIZE = 450  # 预览区域的最长边
+CACHE_LIMIT = 16  # 最多缓存多少张缩略图
+
+_thumbnail_cache: OrderedDict = OrderedDict()
+
+
+def _cache_key(file_path, size):
+    """缓存键：路径 + 修改时间 + 目标尺寸，文件被改过后自动失效"""
+    try:
+        mtime = os.path.getmtime(file_path)
+    except OSError:
+        mtime = None
+    return os.path.abspath(file_path), mtime, size
+
+
+def get_cached_thumbnail(file_path, size=PREVIEW_SIZE):
+    """取出已缓存的缩略图，没有则返回 None"""
+    key = _cache_key(file_path, size)
+    image = _thumbnail_cache.get(key)
+    if image is not None:
+        _thumbnail_cache.move_to_end(key)
+    return image
+
+
+def put_cached_thumbnail(file_path, image, size=PREVIEW_SIZE):
+    """缓存缩略图，超过上限时淘汰最久未使用的"""
+    key = _cache_key(file_path, size)
+    _thumbnail_cache[key] = image
+    _thumbnail_cache.move_to_end(key)
+    while len(_thumbnail_cache) > CACHE_LIMIT:
+        _thumbnail_cache.popitem(last=False)
+
+
+def decode_scaled(file_path, size=PREVIEW_SIZE) -> QImage:
+    """
+    按预览尺寸解码图片，不会先解码出原始分辨率
+    :param file_path: 图片路径
+    :param size: 缩略图最长边
+    :return: 缩放后的 QImage，读取失败时为空图
+    """
+    reader = QImageReader(file_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        # 让解码器直接输出小图（JPEG 会在 DCT 阶段缩小）
+        reader.setScaledSize(original.scaled(QSize(size, size), Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > size or image.height() > size:
+        # 解码器不支持缩放时，在后台线程里补一次缩放
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    return image
+
+
+class _LoaderSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str, str)
+
+
+class ScaledImageLoader(QRunnable):
+    """在线程池中执行 decode_scaled，结果通过信号发回 GUI 线程"""
+
+    def __init__(self, file_path, size=PREVIEW_SIZE):
+        super().__init__()
+        self.file_path = file_path
+        self.size = size
+        self.signals = _LoaderSignals()
+
+    def run(self):
+        image = decode_scaled(self.file_path, self.size)
+        if image.isNull():
+            self.signals.failed.emit(self.file_path, "无法读取图片")
+        else:
+            self.signals.finished.emit(self.file_path, image)
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
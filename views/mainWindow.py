@@ -11,6 +11,8 @@ from PyQt6.QtWidgets import (
 from resource_path import resource_path
 from titleGenerator import generate_font_image, Direction
 from views.ColorWidget import GradientSlider, CustomColorDialog
+from views.ExportTask import ExportTask
+from views.ImageLoader import ScaledImageLoader, get_cached_thumbnail, put_cached_thumbnail
 from views.MessageBox import MessageBox
 
 class MainWindow(QWidget):
@@ -18,6 +20,9 @@ class MainWindow(QWidget):
         super().__init__()
         from PIL.Image import Image
         self.img: Image = None
+        self.render_kwargs: dict | None = None  # 最近一次生成所用的参数，导出 SVG 时复用
+        self.bg_path: str | None = None  # 当前背景图片路径，用于丢弃过期的后台解码结果
+        self._loaders = set()  # 持有正在运行的解码/导出任务，防止信号对象被回收
         self.setWindowTitle("某学都的标题工房")
         self.setGeometry(100, 100, 900, 700)
         self.setWindowIcon(QIcon(resource_path('icons/favicon.ico')))
@@ -187,8 +192,28 @@ class MainWindow(QWidget):
         self.image_preview.setPixmap(QPixmap.fromImage(q_image).scaled(450, 450, Qt.AspectRatioMode.KeepAspectRatio))
 
     def load_image(self, file_path):
-        pixmap = QPixmap(file_path)
-        self.image_preview.setPixmap(pixmap.scaled(450, 450, Qt.AspectRatioMode.KeepAspectRatio))
+        """在后台按预览尺寸解码图片，已解码过的直接用缓存"""
+        self.bg_path = file_path
+        cached = get_cached_thumbnail(file_path)
+        if cached is not None:
+            self.image_preview.setPixmap(QPixmap.fromImage(cached))
+            return
+        loader = ScaledImageLoader(file_path)
+        loader.signals.finished.connect(lambda path, image: self.on_image_loaded(loader, path, image))
+        loader.signals.failed.connect(lambda path, msg: self.on_image_failed(loader, path, msg))
+        self._loaders.add(loader)
+        loader.start()
+
+    def on_image_loaded(self, loader, file_path, image):
+        self._loaders.discard(loader)
+        put_cached_thumbnail(file_path, image)
+        if file_path == self.bg_path:
+            self.image_preview.setPixmap(QPixmap.fromImage(image))
+
+    def on_image_failed(self, loader, file_path, message):
+        self._loaders.discard(loader)
+        if file_path == self.bg_path:
+            MessageBox(f"错误:{message}", "error", parent=self)
 
     def dragEnterEvent(self, event):
         if event.mimeData().hasImage() or event.mimeData().hasUrls():
@@ -218,28 +243,49 @@ class MainWindow(QWidget):
             else:
                 from titleGenerator import magic_color
                 color = magic_color
-            self.img = generate_font_image(text1=self.text_input1.text(), text2=self.text_input2.text(),
-                                           text3=self.text_input3.text(),
-                                           font_path=resource_path("fonts/index.ttf"),
-                                           small_font_path=resource_path("fonts/YuGothB.ttc"), angle=angle,
-                                           colors=color, direction=direction)
+            self.render_kwargs = dict(text1=self.text_input1.text(), text2=self.text_input2.text(),
+                                      text3=self.text_input3.text(),
+                                      font_path=resource_path("fonts/index.ttf"),
+                                      small_font_path=resource_path("fonts/YuGothB.ttc"), angle=angle,
+                                      colors=color, direction=direction)
+            self.img = generate_font_image(**self.render_kwargs)
             self.pil2pixmap()
             MessageBox("生成成功", "success",parent=self)
         except Exception as e:
             print(e.args)
 
     def save_image(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "保存图片", "", "Images (*.png *.jpg)")
+        file_path, _ = QFileDialog.getSaveFileName(self, "保存图片", "",
+                                                   "Images (*.png *.jpg *.webp);;SVG (*.svg)")
         if file_path:
             if self.img:
-                try:
-                    self.img.save(file_path)
+                if file_path.lower().endswith(".svg"):
+                    try:
+                        from svgExporter import save_font_svg
+                        save_font_svg(file_path, **self.render_kwargs)
+                    except Exception as e:
+                        self.on_save_failed(None, str(e.args))
+                        return
                     print("保存图片到", file_path)
-                    MessageBox("保存成功", "success",parent=self)
-                except Exception as e:
-                    print(e.args)
-                    MessageBox(f"错误:{e.args}", "error", parent=self)
+                    self.on_saved(None, [])
                     return
+                # 编码放到后台线程，保存大图时界面不会卡住
+                task = ExportTask(self.img, [file_path])
+                task.signals.finished.connect(lambda results: self.on_saved(task, results))
+                task.signals.failed.connect(lambda message: self.on_save_failed(task, message))
+                self._loaders.add(task)
+                task.start()
+
+    def on_saved(self, task, results):
+        self._loaders.discard(task)
+        for result in results:
+            print("保存图片到", result)
+        MessageBox("保存成功", "success", parent=self)
+
+    def on_save_failed(self, task, message):
+        self._loaders.discard(task)
+        print(message)
+        MessageBox(f"错误:{message}", "error", parent=self)
 
 
 if __name__ == '__main__':